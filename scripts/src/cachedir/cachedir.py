@@ -0,0 +1,40 @@
+"""
+Shared on-disk cache directory of the scripts.
+
+Every cache lives in its own directory under CHARTS_CACHE_DIR, which CI
+persists between runs, and is kept under a size budget by evicting the least
+recently used entries. Entries are JSON files whose modification time is
+refreshed on every hit.
+
+main functions :
+- get_cache_directory - returns the directory of a named cache
+- evict - removes the least recently used entries of a cache over its budget
+"""
+import os
+
+
+def get_cache_directory(name):
+    root = os.environ.get("CHARTS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "openshift-helm-charts")
+    return os.path.join(root, name)
+
+
+def evict(directory, max_bytes):
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
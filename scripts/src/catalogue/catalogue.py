@@ -0,0 +1,307 @@
+"""
+Catalogue of the charts under charts/.
+
+The tree charts/<category>/<organization>/<chart>/<version> is read in a
+single pass with os.scandir, which reports whether an entry is a directory
+without another system call. Every chart records its OWNERS file and its
+versions in semver order, every version whether it has a src directory, a
+tarball and a report.
+
+The catalogue of a commit can also be read from the git object database with
+git ls-tree, without a checkout, and the OWNERS files with git cat-file
+--batch. Only the tree objects are needed, so this works on shallow clones and
+on clones without the chart tarballs checked out.
+
+A catalogue of a directory tracked by git with no local changes, or of a
+commit, is kept on disk under CHARTS_CACHE_DIR, keyed by the hash of the git
+tree, so that the next load of the same tree does not read it at all.
+
+main functions :
+- load - returns the catalogue of a charts directory, from the cache when possible
+- load_tree - returns the catalogue of the charts directory of a commit
+- scan - reads the catalogue of a charts directory
+- scan_tree - reads the catalogue of a charts tree with git ls-tree
+- scan_version - reads one version directory
+- read_blobs - reads git objects with git cat-file --batch
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+import semver
+
+sys.path.append('../')
+from cachedir import cachedir
+
+CACHE_DIRECTORY = "catalogue"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+REPORT_FILE = "report.yaml"
+OWNERS_FILE = "OWNERS"
+SOURCE_DIRECTORY = "src"
+
+
+def version_key(version):
+    """Sort key of a chart version, in semver order.
+
+    Versions with a missing minor or patch number are completed with zeros.
+    Versions that are not semver sort first, by name.
+    """
+    text = version[1:] if version.startswith("v") else version
+    core, sep, rest = text.partition("-") if "-" in text else text.partition("+")
+    parts = core.split(".")
+    if 0 < len(parts) < 3 and all(p.isdigit() for p in parts):
+        text = ".".join(parts + ["0"] * (3 - len(parts))) + sep + rest
+    try:
+        return 1, semver.VersionInfo.parse(text), version
+    except ValueError:
+        return 0, None, version
+
+
+@dataclass
+class ChartVersion:
+    version: str
+    path: str
+    has_source: bool = False
+    has_tarball: bool = False
+    has_report: bool = False
+
+    @property
+    def report_path(self):
+        return os.path.join(self.path, REPORT_FILE)
+
+
+@dataclass
+class Chart:
+    category: str
+    organization: str
+    name: str
+    path: str
+    owners_path: Optional[str] = None
+    versions: List[ChartVersion] = field(default_factory=list)
+    # Object id of the OWNERS file, only known when read from a git tree
+    owners_sha: Optional[str] = None
+
+    def latest(self):
+        """Returns the highest version, None if the chart has no version."""
+        return self.versions[-1] if self.versions else None
+
+    def get_version(self, version):
+        return next((v for v in self.versions if v.version == version), None)
+
+
+@dataclass
+class Catalogue:
+    charts: List[Chart] = field(default_factory=list)
+
+    def get_chart(self, category, organization, name):
+        return next((c for c in self.charts
+                     if (c.category, c.organization, c.name) == (category, organization, name)), None)
+
+    def by_category(self, categories):
+        return [c for c in self.charts if c.category in categories]
+
+
+def _subdirectories(path):
+    try:
+        with os.scandir(path) as it:
+            return sorted(e.name for e in it if e.is_dir())
+    except FileNotFoundError:
+        return []
+
+
+def scan_version(path, chart, version):
+    """Reads the version directory of a chart with a single scandir."""
+    chart_version = ChartVersion(version, path)
+    tarball = f"{chart}-{version}.tgz"
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name == SOURCE_DIRECTORY and entry.is_dir():
+                    chart_version.has_source = True
+                elif entry.name == tarball and entry.is_file():
+                    chart_version.has_tarball = True
+                elif entry.name == REPORT_FILE and entry.is_file():
+                    chart_version.has_report = True
+    except FileNotFoundError:
+        pass
+    return chart_version
+
+
+def scan(charts_path):
+    """Reads the catalogue of charts_path, the charts/ directory."""
+    catalogue = Catalogue()
+    for category in _subdirectories(charts_path):
+        category_path = os.path.join(charts_path, category)
+        for organization in _subdirectories(category_path):
+            organization_path = os.path.join(category_path, organization)
+            for name in _subdirectories(organization_path):
+                chart_path = os.path.join(organization_path, name)
+                chart = Chart(category, organization, name, chart_path)
+                versions = []
+                with os.scandir(chart_path) as it:
+                    for entry in it:
+                        if entry.is_dir():
+                            versions.append(entry.name)
+                        elif entry.name == OWNERS_FILE:
+                            chart.owners_path = entry.path
+                for version in sorted(versions, key=version_key):
+                    chart.versions.append(scan_version(os.path.join(chart_path, version), name, version))
+                catalogue.charts.append(chart)
+    return catalogue
+
+
+def _git(repo_path, *args, **kwargs):
+    out = subprocess.run(["git", *args], cwd=repo_path, capture_output=True, **kwargs)
+    if out.returncode != 0:
+        stderr = out.stderr if isinstance(out.stderr, str) else out.stderr.decode("utf-8", "replace")
+        raise Exception(f"git {args[0]} failed: {stderr.strip()}")
+    return out.stdout
+
+
+def scan_tree(repo_path, treeish, charts_directory="charts"):
+    """Reads the catalogue of the charts directory of treeish with a single git ls-tree.
+
+    Paths are reported under repo_path/charts_directory, whether or not the
+    files are checked out there.
+    """
+    charts_path = os.path.join(repo_path, charts_directory)
+    out = _git(repo_path, "ls-tree", "-r", "-t", "-z", "--full-tree", treeish, "--", charts_directory, text=True)
+    charts = {}
+    versions = {}
+    depth = len(charts_directory.split("/"))
+    for line in out.split("\0"):
+        if not line:
+            continue
+        info, path = line.split("\t", 1)
+        _, object_type, sha = info.split(" ")
+        parts = path.split("/")[depth:]
+        if len(parts) == 3 and object_type == "tree":
+            charts[tuple(parts)] = Chart(*parts, os.path.join(charts_path, *parts))
+        elif len(parts) == 4 and object_type == "tree":
+            versions.setdefault(tuple(parts[:3]), {})[parts[3]] = ChartVersion(parts[3], os.path.join(charts_path, *parts))
+        elif len(parts) == 4 and parts[3] == OWNERS_FILE and object_type == "blob":
+            chart = charts[tuple(parts[:3])]
+            chart.owners_path = os.path.join(chart.path, OWNERS_FILE)
+            chart.owners_sha = sha
+        elif len(parts) == 5:
+            chart_version = versions[tuple(parts[:3])][parts[3]]
+            name = parts[4]
+            if name == SOURCE_DIRECTORY and object_type == "tree":
+                chart_version.has_source = True
+            elif name == f"{parts[2]}-{parts[3]}.tgz" and object_type == "blob":
+                chart_version.has_tarball = True
+            elif name == REPORT_FILE and object_type == "blob":
+                chart_version.has_report = True
+
+    catalogue = Catalogue()
+    for key in sorted(charts):
+        chart = charts[key]
+        chart_versions = versions.get(key, {})
+        chart.versions = [chart_versions[v] for v in sorted(chart_versions, key=version_key)]
+        catalogue.charts.append(chart)
+    return catalogue
+
+
+def read_blobs(repo_path, shas):
+    """Returns the content of the git objects shas, read with a single git cat-file --batch.
+
+    Returns:
+    dict: bytes content by object id, objects that are missing are left out
+    """
+    shas = list(dict.fromkeys(shas))
+    if not shas:
+        return {}
+    out = _git(repo_path, "cat-file", "--batch", input="".join(f"{sha}\n" for sha in shas).encode("utf-8"))
+    blobs = {}
+    offset = 0
+    for sha in shas:
+        end = out.index(b"\n", offset)
+        header = out[offset:end].decode("utf-8").split(" ")
+        offset = end + 1
+        if header[-1] == "missing":
+            continue
+        size = int(header[2])
+        blobs[sha] = out[offset:offset + size]
+        # Contents are followed by a newline
+        offset += size + 1
+    return blobs
+
+
+def get_tree_hash(charts_path):
+    """Returns the git tree hash of charts_path, None if it is not tracked or has local changes."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD:./"], cwd=charts_path, capture_output=True, text=True)
+        if out.returncode != 0:
+            return None
+        tree_hash = out.stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=charts_path, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if status.returncode != 0 or status.stdout.strip():
+        return None
+    return tree_hash
+
+
+def _from_dict(data, charts_path):
+    charts = []
+    for c in data["charts"]:
+        chart_path = os.path.join(charts_path, c["category"], c["organization"], c["name"])
+        owners_path = os.path.join(chart_path, OWNERS_FILE) if c["owners"] else None
+        versions = [ChartVersion(v["version"], os.path.join(chart_path, v["version"]), v["has_source"],
+                                 v["has_tarball"], v["has_report"]) for v in c["versions"]]
+        charts.append(Chart(c["category"], c["organization"], c["name"], chart_path, owners_path, versions,
+                            c.get("owners_sha")))
+    return Catalogue(charts)
+
+
+def _to_dict(catalogue):
+    # Paths are stored relative so that a cached tree can be loaded from any checkout
+    charts = []
+    for chart in catalogue.charts:
+        versions = [{k: v for k, v in asdict(version).items() if k != "path"} for version in chart.versions]
+        charts.append({"category": chart.category, "organization": chart.organization, "name": chart.name,
+                       "owners": chart.owners_path is not None, "owners_sha": chart.owners_sha,
+                       "versions": versions})
+    return {"charts": charts}
+
+
+def _load_cached(tree_hash, charts_path, build):
+    directory = cachedir.get_cache_directory(CACHE_DIRECTORY)
+    path = os.path.join(directory, f"{tree_hash}.json")
+    try:
+        with open(path) as fd:
+            data = json.load(fd)
+        # Mark the entry as recently used
+        os.utime(path)
+        return _from_dict(data, charts_path)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    catalogue = build()
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as out:
+        json.dump(_to_dict(catalogue), out, separators=(",", ":"))
+    os.replace(tmp, path)
+    cachedir.evict(directory, int(os.environ.get("CATALOGUE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+    return catalogue
+
+
+def load(charts_path):
+    """Returns the catalogue of charts_path, from the cache when its git tree was scanned before."""
+    tree_hash = get_tree_hash(charts_path)
+    if tree_hash is None:
+        return scan(charts_path)
+    return _load_cached(tree_hash, charts_path, lambda: scan(charts_path))
+
+
+def load_tree(repo_path, treeish, charts_directory="charts"):
+    """Returns the catalogue of the charts directory of treeish, from the cache when it was read before."""
+    tree_hash = _git(repo_path, "rev-parse", f"{treeish}:{charts_directory}", text=True).strip()
+    charts_path = os.path.join(repo_path, charts_directory)
+    # Kept apart from the scans of a checkout, which do not know the object id of the OWNERS files
+    return _load_cached(f"tree-{tree_hash}", charts_path, lambda: scan_tree(repo_path, treeish, charts_directory))
@@ -0,0 +1,66 @@
+import os
+import subprocess
+
+from catalogue import catalogue
+
+def make_chart(charts_path, versions, owners=True):
+    chart_path = os.path.join(charts_path, "partners", "acme", "alpha")
+    os.makedirs(chart_path)
+    if owners:
+        open(os.path.join(chart_path, "OWNERS"), "w").close()
+    for version, files in versions.items():
+        os.makedirs(os.path.join(chart_path, version))
+        for name in files:
+            path = os.path.join(chart_path, version, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+def test_scan_sorts_versions_by_semver(tmpdir):
+    charts_path = str(tmpdir.join("charts"))
+    make_chart(charts_path, {"1.10.0": ["src/Chart.yaml"], "1.9.0": ["alpha-1.9.0.tgz", "report.yaml"], "1.2": ["report.yaml"]})
+    chart = catalogue.scan(charts_path).get_chart("partners", "acme", "alpha")
+    assert [v.version for v in chart.versions] == ["1.2", "1.9.0", "1.10.0"]
+    assert chart.owners_path == os.path.join(charts_path, "partners", "acme", "alpha", "OWNERS")
+    assert chart.latest() == catalogue.ChartVersion("1.10.0", os.path.join(chart.path, "1.10.0"), has_source=True)
+    assert (chart.get_version("1.9.0").has_tarball, chart.get_version("1.9.0").has_report) == (True, True)
+
+def make_repo(repo, versions):
+    make_chart(os.path.join(repo, "charts"), versions)
+    subprocess.run(["git", "init", "-q", repo], check=True)
+    subprocess.run(["git", "-C", repo, "add", "."], check=True)
+    subprocess.run(["git", "-C", repo, "-c", "user.name=test", "-c", "user.email=test@example.com",
+                    "commit", "-q", "-m", "charts"], check=True)
+
+def test_load_caches_by_tree_hash(tmpdir, monkeypatch):
+    monkeypatch.setenv("CHARTS_CACHE_DIR", str(tmpdir.join("cache")))
+    repo = str(tmpdir.join("repo"))
+    charts_path = os.path.join(repo, "charts")
+    make_repo(repo, {"0.1.0": ["src/Chart.yaml"]})
+    tree_hash = catalogue.get_tree_hash(charts_path)
+    assert tree_hash
+
+    first = catalogue.load(charts_path)
+    assert os.path.exists(tmpdir.join("cache", catalogue.CACHE_DIRECTORY, f"{tree_hash}.json"))
+    monkeypatch.setattr(catalogue, "scan", lambda charts_path: None)
+    assert catalogue.load(charts_path) == first
+
+    # Local changes are not cached
+    open(os.path.join(charts_path, "partners", "acme", "alpha", "0.1.0", "report.yaml"), "w").close()
+    assert catalogue.get_tree_hash(charts_path) is None
+
+def test_scan_tree_matches_scan(tmpdir):
+    repo = str(tmpdir.join("repo"))
+    make_repo(repo, {"1.10.0": ["src/Chart.yaml"], "1.9.0": ["alpha-1.9.0.tgz", "report.yaml"]})
+    with open(os.path.join(repo, "charts", "partners", "acme", "alpha", "OWNERS"), "w") as fd:
+        fd.write("chart:\n  name: alpha\n")
+    subprocess.run(["git", "-C", repo, "-c", "user.name=test", "-c", "user.email=test@example.com",
+                    "commit", "-q", "-am", "owners"], check=True)
+    # The tree is read from the object database, not from the checkout
+    subprocess.run(["git", "-C", repo, "rm", "-rq", "charts"], check=True)
+
+    tree = catalogue.scan_tree(repo, "HEAD")
+    chart = tree.get_chart("partners", "acme", "alpha")
+    assert [v.version for v in chart.versions] == ["1.9.0", "1.10.0"]
+    assert chart.latest().has_source and chart.get_version("1.9.0").has_tarball and chart.get_version("1.9.0").has_report
+    assert chart.owners_path == os.path.join(repo, "charts", "partners", "acme", "alpha", "OWNERS")
+    assert catalogue.read_blobs(repo, [chart.owners_sha, "0" * 40]) == {chart.owners_sha: b"chart:\n  name: alpha\n"}
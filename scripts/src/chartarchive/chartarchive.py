@@ -0,0 +1,93 @@
+"""
+Chart archives read and rewritten in process.
+
+A chart archive is a gzip compressed tar whose members are stored under the
+directory of the chart, <chart>/Chart.yaml, <chart>/values.yaml, ... The
+archive is read as a stream: reading Chart.yaml stops at that member, which
+helm writes first, and rewriting a member copies the others through without
+extracting them.
+
+main functions :
+- iter_files - iterates over the files of a chart archive
+- read_chart_yaml - returns the content of Chart.yaml
+- load_chart_yaml - returns Chart.yaml parsed
+- rewrite_member - copies a chart archive with one member transformed
+"""
+import copy
+import io
+import os
+import tarfile
+import tempfile
+
+import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+CHART_YAML = "Chart.yaml"
+
+
+def _chart_name(member_name):
+    """Returns the name of a member relative to the chart directory, None for the directory itself."""
+    # Archives made with tar -C . store their members under ./<chart>/
+    while member_name.startswith("./"):
+        member_name = member_name[2:]
+    parts = member_name.split("/", 1)
+    return parts[1] if len(parts) == 2 and parts[1] else None
+
+
+def iter_files(path):
+    """Yields (name, file object) for the regular files of the chart archive at path.
+
+    Names are relative to the chart directory. A file object can only be read
+    until the next file is requested.
+    """
+    with tarfile.open(path, "r|gz") as tar:
+        for member in tar:
+            name = _chart_name(member.name)
+            if name is None or not member.isfile():
+                continue
+            yield name, tar.extractfile(member)
+
+
+def read_chart_yaml(path):
+    """Returns the content of the Chart.yaml of the chart archive at path, None if it has none."""
+    for name, fd in iter_files(path):
+        if name == CHART_YAML:
+            return fd.read().decode("utf-8")
+    return None
+
+
+def load_chart_yaml(path):
+    content = read_chart_yaml(path)
+    if content is None:
+        return None
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def rewrite_member(src, dst, name, transform):
+    """Copies the chart archive src to dst with the content of member name replaced by transform(content).
+
+    Every other member is copied through as it is. src and dst may be the
+    same path, dst is replaced once the copy is complete.
+    """
+    directory = os.path.dirname(os.path.abspath(dst))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, tarfile.open(src, "r|gz") as tar_in, \
+                tarfile.open(fileobj=out, mode="w|gz") as tar_out:
+            for member in tar_in:
+                if not member.isfile():
+                    tar_out.addfile(member)
+                elif _chart_name(member.name) == name:
+                    content = transform(tar_in.extractfile(member).read())
+                    info = copy.copy(member)
+                    info.size = len(content)
+                    tar_out.addfile(info, io.BytesIO(content))
+                else:
+                    tar_out.addfile(member, tar_in.extractfile(member))
+        os.replace(tmp, dst)
+    except BaseException:
+        os.remove(tmp)
+        raise
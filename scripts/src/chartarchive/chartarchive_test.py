@@ -0,0 +1,40 @@
+import io
+import tarfile
+
+from chartarchive import chartarchive
+
+def make_archive(path, files):
+    with tarfile.open(path, "w:gz") as tar:
+        for name, content in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(content))
+
+def read_archive(path):
+    with tarfile.open(path, "r:gz") as tar:
+        return [(m.name, m.mode, tar.extractfile(m).read()) for m in tar.getmembers()]
+
+def test_read_chart_yaml(tmpdir):
+    path = str(tmpdir.join("alpha-0.1.0.tgz"))
+    make_archive(path, [("alpha/charts/beta/Chart.yaml", b"name: beta\n"),
+                        ("alpha/Chart.yaml", b"name: alpha\nversion: 0.1.0\n"),
+                        ("alpha/values.yaml", b"")])
+    assert chartarchive.read_chart_yaml(path) == "name: alpha\nversion: 0.1.0\n"
+    assert chartarchive.load_chart_yaml(path) == {"name": "alpha", "version": "0.1.0"}
+    assert [name for name, _ in chartarchive.iter_files(path)] == ["charts/beta/Chart.yaml", "Chart.yaml", "values.yaml"]
+
+def test_read_chart_yaml_with_dot_prefix(tmpdir):
+    path = str(tmpdir.join("alpha-0.1.0.tgz"))
+    make_archive(path, [("./alpha/Chart.yaml", b"name: alpha\n"), ("./alpha/values.yaml", b"")])
+    assert chartarchive.read_chart_yaml(path) == "name: alpha\n"
+    assert [name for name, _ in chartarchive.iter_files(path)] == ["Chart.yaml", "values.yaml"]
+
+def test_rewrite_member(tmpdir):
+    src = str(tmpdir.join("src.tgz"))
+    dst = str(tmpdir.join("dst.tgz"))
+    make_archive(src, [("alpha/Chart.yaml", b"name: alpha\n"), ("alpha/values.yaml", b"replicas: 1\n")])
+    chartarchive.rewrite_member(src, dst, "Chart.yaml", lambda content: content + b"kubeVersion: '>=1.20'\n")
+    assert read_archive(dst) == [("alpha/Chart.yaml", 0o644, b"name: alpha\nkubeVersion: '>=1.20'\n"),
+                                 ("alpha/values.yaml", 0o644, b"replicas: 1\n")]
+    assert tmpdir.listdir(lambda p: p.ext == ".tmp") == []
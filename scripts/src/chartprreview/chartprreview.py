@@ -5,18 +5,46 @@ import argparse
 import subprocess
 import json
 import hashlib
+import tarfile
 import tempfile
+import threading
+import queue
+from dataclasses import dataclass, asdict
 
 import semver
 import requests
 import yaml
+import docker
 try:
-    from yaml import CLoader as Loader, CDumper as Dumper
+    from yaml import CLoader as Loader, CDumper as Dumper, CBaseLoader as BaseLoader
 except ImportError:
-    from yaml import Loader, Dumper
+    from yaml import Loader, Dumper, BaseLoader
 
 sys.path.append('../')
 from report import report_info
+from report import verifier_session
+from report import verify_cache
+from catalogue import catalogue
+from chartarchive import chartarchive
+from github import pullrequest
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+FINDINGS_FILE = "findings.json"
+
+# Findings and child processes of the check run by the current thread, see run_checks
+CHECK_FINDINGS = threading.local()
+# Null scalars, which the BaseLoader keeps as strings
+YAML_NULLS = ("", "~", "null", "Null", "NULL")
+# Seconds a terminated child process is given to exit before it is killed
+CHILD_TERMINATE_TIMEOUT = 30
+
+@dataclass
+class Finding:
+    severity: str
+    code: str
+    message: str
 
 def write_error_log(directory, *msg):
     with open(os.path.join(directory, "errors"), "w") as fd:
@@ -25,50 +53,107 @@ def write_error_log(directory, *msg):
             fd.write(line)
             fd.write("\n")
 
+def add_finding(directory, severity, code, *msg):
+    """Records a finding of the running check.
+
+    Outside run_checks the message is written to the errors file right away.
+    """
+    findings = getattr(CHECK_FINDINGS, "findings", None)
+    if findings is None:
+        write_error_log(directory, *msg)
+        return
+    for line in msg:
+        print(line)
+    findings.append(Finding(severity, code, "\n".join(msg)))
+
+def fail_check(directory, code, *msg, severity=ERROR):
+    """Records a finding and stops the running check."""
+    add_finding(directory, severity, code, *msg)
+    sys.exit(1)
+
+class ChildProcesses:
+    """Child processes started by the checks of a run.
+
+    When the run stops before every check finished, the processes still
+    running are terminated instead of being left behind, and no new one is
+    started.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = set()
+        self.stopped = False
+
+    def run(self, command):
+        """Runs command like subprocess.run with capture_output."""
+        with self.lock:
+            if self.stopped:
+                sys.exit(1)
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            self.processes.add(process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def terminate(self):
+        with self.lock:
+            self.stopped = True
+            processes = list(self.processes)
+        # docker run forwards the signal to its container, which --rm then removes
+        for process in processes:
+            print(f"[INFO] Terminating {' '.join(process.args[:2])}, process {process.pid}")
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(CHILD_TERMINATE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def run_child(command):
+    """Runs command, tracked by run_checks when called from a check."""
+    children = getattr(CHECK_FINDINGS, "children", None)
+    if children is None:
+        return subprocess.run(command, capture_output=True)
+    return children.run(command)
+
 def get_vendor_type(directory):
     vendor_type = os.environ.get("VENDOR_TYPE")
     if not vendor_type or vendor_type not in {"partner", "redhat", "community"}:
         msg = "[ERROR] Chart files need to be under one of charts/partners, charts/redhat, or charts/community"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "invalid-category", msg)
     return vendor_type
 
 def get_labels(api_url):
     # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    r = requests.get(api_url, headers=headers)
-    return r.json()["labels"]
+    return pullrequest.get_labels(api_url)
 
 def get_modified_charts(directory, api_url):
     print("[INFO] Get modified charts. %s" %directory)
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    r = requests.get(files_api_url, headers=headers)
     pattern = re.compile(r"charts/(\w+)/([\w-]+)/([\w-]+)/([\w\.-]+)/.*")
-    for f in r.json():
+    for f in pullrequest.get_files(api_url):
         m = pattern.match(f["filename"])
         if m:
             category, organization, chart, version = m.groups()
             return category, organization, chart, version
 
     msg = "[ERROR] One or more files included in the pull request are not part of the chart"
-    write_error_log(directory, msg)
-    sys.exit(1)
+    fail_check(directory, "files-outside-chart", msg)
 
 def verify_user(directory, username, category, organization, chart):
     print("[INFO] Verify user. %s, %s, %s, %s"% (username, category, organization, chart))
     owners_path = os.path.join("charts", category, organization, chart, "OWNERS")
     if not os.path.exists(owners_path):
         msg = f"[ERROR] {owners_path} file does not exist."
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "owners-missing", msg)
 
     data = open(owners_path).read()
     out = yaml.load(data, Loader=Loader)
     if username not in [x['githubUsername'] for x in out['users']]:
         msg = f"[ERROR] {username} is not allowed to submit the chart on behalf of {organization}"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "user-not-allowed", msg)
 
 def check_owners_file_against_directory_structure(directory,username, category, organization, chart):
     print("[INFO] Check owners file against directory structure. %s, %s, %s" % (category, organization, chart))
@@ -85,8 +170,7 @@ def check_owners_file_against_directory_structure(directory,username, category,
         msgs.append(f"[ERROR] chart/name in OWNERS file ({chart_name}) doesn't match the directory structure (charts/{category}/{organization}/{chart})")
         error_exit = True
     if error_exit:
-        write_error_log(directory, *msgs)
-        sys.exit(1)
+        fail_check(directory, "owners-mismatch", *msgs)
 
 def verify_signature(directory, category, organization, chart, version):
     print("[INFO] Verify signature. %s, %s, %s" % (organization, chart, version))
@@ -118,8 +202,7 @@ def match_checksum(directory, category, organization, chart, version):
 
     if  submitted_digest != generated_digest:
         msg = f"[ERROR] Digest is not matching: {submitted_digest}, {generated_digest}"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "digest-mismatch", msg)
 
 def check_url(directory, report_path):
     print("[INFO] Check chart_url is a valid url. %s" % report_path)
@@ -131,28 +214,25 @@ def check_url(directory, report_path):
         msgs = []
         msgs.append(f"Invalid schema: {chart_url}")
         msgs.append(str(err))
-        write_error_log(directory, *msgs)
-        sys.exit(1)
+        fail_check(directory, "invalid-chart-url", *msgs)
     except requests.exceptions.InvalidURL as err:
         msgs = []
         msgs.append(f"Invalid URL: {chart_url}")
         msgs.append(str(err))
-        write_error_log(directory, *msgs)
-        sys.exit(1)
+        fail_check(directory, "invalid-chart-url", *msgs)
     except requests.exceptions.MissingSchema as err:
         msgs = []
         msgs.append(f"Missing schema in URL: {chart_url}")
         msgs.append(str(err))
-        write_error_log(directory, *msgs)
-        sys.exit(1)
+        fail_check(directory, "invalid-chart-url", *msgs)
 
     try:
         r.raise_for_status()
     except requests.exceptions.HTTPError as err:
         msgs = []
-        msgs.append("[WARNING] URL is not accessible: {chart_url} ")
+        msgs.append(f"[WARNING] URL is not accessible: {chart_url} ")
         msgs.append(str(err))
-        write_error_log(directory, *msgs)
+        add_finding(directory, WARNING, "chart-url-not-accessible", *msgs)
 
 def match_name_and_version(directory, category, organization, chart, version):
     print("[INFO] Check chart has same name and version as directory structure. %s, %s, %s" % (organization, chart, version))
@@ -164,13 +244,11 @@ def match_name_and_version(directory, category, organization, chart, version):
 
         if submitted_report_chart_name != chart:
             msg = f"[ERROR] Chart name ({submitted_report_chart_name}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "name-mismatch", msg)
 
         if submitted_report_chart_version != version:
             msg = f"[ERROR] Chart version ({submitted_report_chart_version}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "version-mismatch", msg)
 
         if os.path.exists("report.yaml"):
             report_chart = report_info.get_report_chart("report.yaml")
@@ -179,13 +257,11 @@ def match_name_and_version(directory, category, organization, chart, version):
 
             if submitted_report_chart_name != report_chart_name:
                 msg = f"[ERROR] Chart name in the chart is not matching against the value in the report: {submitted_report_chart_name} vs {report_chart_name}"
-                write_error_log(directory, msg)
-                sys.exit(1)
+                fail_check(directory, "report-name-mismatch", msg)
 
             if submitted_report_chart_version != report_chart_version:
                 msg = f"[ERROR] Chart version in the chart is not matching against the value in the report: {submitted_report_chart_version} vs. {report_chart_version}"
-                write_error_log(directory, msg)
-                sys.exit(1)
+                fail_check(directory, "report-version-mismatch", msg)
     else:
         report_chart = report_info.get_report_chart("report.yaml")
         report_chart_name = report_chart["name"]
@@ -193,13 +269,11 @@ def match_name_and_version(directory, category, organization, chart, version):
 
         if report_chart_name != chart:
             msg = f"[ERROR] Chart name ({report_chart_name}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "name-mismatch", msg)
 
         if report_chart_version != version:
             msg = f"[ERROR] Chart version ({report_chart_version}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "version-mismatch", msg)
 
 def check_report_success(directory, api_url, report_path, version):
     print("[INFO] Check report success. %s" % report_path)
@@ -209,14 +283,17 @@ def check_report_success(directory, api_url, report_path, version):
     quoted_data = data.replace("%", "%25").replace("\n", "%0A").replace("\r", "%0D")
     print(f"::set-output name=report_content::{quoted_data}")
 
-    chart = report_info.get_report_chart(report_path)
+    vendor_type = get_vendor_type(directory)
+    sections = report_info.get_report_sections(report_path,
+                                               [report_info.REPORT_METADATA, report_info.REPORT_ANNOTATIONS, report_info.REPORT_RESULTS],
+                                               profile=(vendor_type, ""))
+    chart = sections[report_info.REPORT_METADATA]["chart"]
     report_version = chart["version"]
     if report_version != version:
         msg = f"[ERROR] Chart Version '{report_version}' doesn't match the version in the directory path: '{version}'"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "version-mismatch", msg)
 
-    annotations = report_info.get_report_annotations(report_path)
+    annotations = sections[report_info.REPORT_ANNOTATIONS]
 
     required_annotations = {"charts.openshift.io/lastCertifiedTimestamp",
                             "charts.openshift.io/certifiedOpenShiftVersions",
@@ -225,13 +302,11 @@ def check_report_success(directory, api_url, report_path, version):
     available_annotations = set(annotations.keys())
 
     missing_annotations = required_annotations - available_annotations
-    for annotation in missing_annotations:
-        msg = f"[ERROR] Missing annotation in chart/report: {annotation}"
-        write_error_log(directory, msg)
-        sys.exit(1)
+    if missing_annotations:
+        msgs = [f"[ERROR] Missing annotation in chart/report: {annotation}" for annotation in sorted(missing_annotations)]
+        fail_check(directory, "missing-annotation", *msgs)
 
-    vendor_type = get_vendor_type(directory)
-    report = report_info.get_report_results(report_path,vendor_type,"")
+    report = sections[report_info.REPORT_RESULTS]
 
     labels = get_labels(api_url)
     label_names = [l["name"] for l in labels]
@@ -247,7 +322,7 @@ def check_report_success(directory, api_url, report_path, version):
         msgs.append(f"- Error message(s):")
         for m in report["message"]:
             msgs.append(f"  - {m}")
-        write_error_log(directory, *msgs)
+        add_finding(directory, ERROR, "report-failures", *msgs)
         if vendor_type == "redhat":
             print(f"::set-output name=redhat_to_community::True")
         if vendor_type != "redhat" and "force-publish" not in label_names:
@@ -256,8 +331,7 @@ def check_report_success(directory, api_url, report_path, version):
     if vendor_type == "community" and "force-publish" not in label_names:
         # requires manual review and approval
         msg = "[INFO] Community charts require manual review and approval from maintainers"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "manual-review", msg, severity=INFO)
 
     if failures_in_report or vendor_type == "community":
         return
@@ -266,9 +340,92 @@ def check_report_success(directory, api_url, report_path, version):
         full_version = annotations["charts.openshift.io/certifiedOpenShiftVersions"]
         if not semver.VersionInfo.isvalid(full_version):
             msg = f"[ERROR] OpenShift version not conforming to SemVer spec: {full_version}"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "invalid-openshift-version", msg)
+
+
+def read_chart_files(category, organization, chart, version):
+    """Returns the Chart.yaml content and the file names of the submitted chart source or tarball.
+
+    File names are relative to the chart directory. Returns (None, None) when
+    neither the source nor the tarball is submitted.
+    """
+    chart_dir = os.path.join("charts", category, organization, chart, version)
+    src = os.path.join(chart_dir, "src")
+    tar = os.path.join(chart_dir, f"{chart}-{version}.tgz")
+    chart_yaml = None
+    names = set()
+    if os.path.isdir(src):
+        for root, _, files in os.walk(src):
+            for name in files:
+                names.add(os.path.relpath(os.path.join(root, name), src))
+        if "Chart.yaml" in names:
+            with open(os.path.join(src, "Chart.yaml")) as fd:
+                chart_yaml = fd.read()
+    elif os.path.exists(tar):
+        for name, fd in chartarchive.iter_files(tar):
+            names.add(name)
+            if name == chartarchive.CHART_YAML:
+                chart_yaml = fd.read().decode("utf-8")
+    else:
+        return None, None
+    return chart_yaml, names
+
+def static_precheck(directory, category, organization, chart, version):
+    """Checks the chart files in process, before the verifier is run against the cluster."""
+    print("[INFO] Static precheck. %s, %s, %s" % (organization, chart, version))
+    try:
+        chart_yaml, names = read_chart_files(category, organization, chart, version)
+    except (tarfile.TarError, EOFError, OSError) as err:
+        fail_check(directory, "invalid-tarball", f"[ERROR] Unable to read the chart tarball: {err}")
+    if names is None:
+        return
+    if chart_yaml is None:
+        fail_check(directory, "chart-yaml-missing", "[ERROR] Chart.yaml not found in the chart")
+    try:
+        # Chart.yaml comes from the PR, and scalars are kept as the strings
+        # helm reads: a version 1.10 must not become the float 1.1
+        data = yaml.load(chart_yaml, Loader=BaseLoader)
+    except yaml.YAMLError as err:
+        fail_check(directory, "invalid-chart-yaml", f"[ERROR] Unable to parse Chart.yaml: {err}")
+    if not isinstance(data, dict):
+        fail_check(directory, "invalid-chart-yaml", "[ERROR] Chart.yaml is not a mapping")
+
+    failed = False
+    if data.get("name") != chart:
+        failed = True
+        add_finding(directory, ERROR, "name-mismatch", f"[ERROR] Chart name in Chart.yaml ({data.get('name')}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})")
+    if data.get("version") != version:
+        failed = True
+        add_finding(directory, ERROR, "version-mismatch", f"[ERROR] Chart version in Chart.yaml ({data.get('version')}) doesn't match the directory structure (charts/{category}/{organization}/{chart}/{version})")
+
+    # Mandatory in the partner profile, the verifier has the last word for the others
+    severity = ERROR if get_vendor_type(directory) == "partner" else WARNING
+    if data.get("kubeVersion", "") in YAML_NULLS:
+        failed = failed or severity == ERROR
+        add_finding(directory, severity, "kubeversion-missing", f"[{severity.upper()}] kubeVersion is not set in Chart.yaml")
+    if "values.schema.json" not in names:
+        failed = failed or severity == ERROR
+        add_finding(directory, severity, "values-schema-missing", f"[{severity.upper()}] values.schema.json is missing from the chart")
+    if failed:
+        sys.exit(1)
 
+def get_verify_cache_key(chart_path, vendor_type, flags):
+    """Returns the verify cache key of the chart, None when the run cannot be cached.
+
+    Runs are only cached when OPENSHIFT_VERSION gives the version of the
+    cluster the verifier runs against.
+    """
+    openshift_version = os.environ.get("OPENSHIFT_VERSION", "").strip()
+    # jq prints null when the cluster version cannot be read
+    if not openshift_version or openshift_version == "null":
+        print("[INFO] OPENSHIFT_VERSION not set, verify cache disabled")
+        return None
+    try:
+        image_digest = verifier_session.get_session().image_digest()
+    except docker.errors.DockerException as err:
+        print("[WARNING] Unable to get the verifier image digest, verify cache disabled:", err)
+        return None
+    return verify_cache.make_key(chart_path, image_digest, vendor_type, flags, openshift_version)
 
 def generate_verify_report(directory, category, organization, chart, version):
     print("[INFO] Generate verify report. %s, %s, %s" % (organization,chart,version))
@@ -283,35 +440,42 @@ def generate_verify_report(directory, category, organization, chart, version):
         tar_exists = True
     if src_exists and tar_exists:
         msg = "[ERROR] Both chart source directory and tarball should not exist"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "source-and-tarball", msg)
     if not os.path.exists(report_path):
         if not src_exists and not tar_exists:
             msg = "[ERROR] One of these must be modified: report, chart source, or tarball"
-            write_error_log(directory, msg)
-            sys.exit(1)
+            fail_check(directory, "chart-missing", msg)
     kubeconfig = os.environ.get("KUBECONFIG")
     if not kubeconfig:
         msg = "[ERROR] missing 'KUBECONFIG' environment variable"
-        write_error_log(directory, msg)
-        sys.exit(1)
+        fail_check(directory, "kubeconfig-missing", msg)
     vendor_type = get_vendor_type(directory)
+    if src_exists or tar_exists:
+        chart_path = src if src_exists else os.path.join(os.getcwd(), tar)
+        flags = ["has-readme"] if os.path.exists(report_path) else []
+        cache_key = get_verify_cache_key(chart_path, vendor_type, flags)
+        cached = verify_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print("[INFO] verify report found in cache:\n", cached)
+            with open("report.yaml", "w") as fd:
+                fd.write(cached)
+            return
     if src_exists:
         if os.path.exists(report_path):
-            out = subprocess.run(["docker", "run", "-v", src+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
-                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", "-e", "has-readme", "/charts"], capture_output=True)
+            out = run_child(["docker", "run", "-v", src+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
+                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", "-e", "has-readme", "/charts"])
         else:
-            out = subprocess.run(["docker", "run", "-v", src+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
-                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", "/charts"], capture_output=True)
+            out = run_child(["docker", "run", "-v", src+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
+                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", "/charts"])
     elif tar_exists:
         dn = os.path.join(os.getcwd(), "charts", category,
                           organization, chart, version)
         if os.path.exists(report_path):
-            out = subprocess.run(["docker", "run", "-v", dn+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm", os.environ.get("VERIFIER_IMAGE"),
-                                 "verify", "--set", f"profile.vendortype={vendor_type}", "-e", "has-readme", f"/charts/{chart}-{version}.tgz"], capture_output=True)
+            out = run_child(["docker", "run", "-v", dn+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm", os.environ.get("VERIFIER_IMAGE"),
+                                 "verify", "--set", f"profile.vendortype={vendor_type}", "-e", "has-readme", f"/charts/{chart}-{version}.tgz"])
         else:
-            out = subprocess.run(["docker", "run", "-v", dn+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
-                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", f"/charts/{chart}-{version}.tgz"], capture_output=True)
+            out = run_child(["docker", "run", "-v", dn+":/charts:z", "-v", kubeconfig+":/kubeconfig", "-e", "KUBECONFIG=/kubeconfig", "--rm",
+                                 os.environ.get("VERIFIER_IMAGE"), "verify", "--set", f"profile.vendortype={vendor_type}", f"/charts/{chart}-{version}.tgz"])
     else:
         return
 
@@ -320,7 +484,87 @@ def generate_verify_report(directory, category, organization, chart, version):
     print("[INFO] report:\n", stderr)
     with open(report_path, "w") as fd:
         fd.write(stderr)
-
+    # chart-verifier exits 0 when checks fail, and a failed chart-testing may
+    # be a cluster flake cleared by a rerun, so only fully passed reports are cached
+    if cache_key and out.returncode == 0 and verify_cache.all_checks_passed(stderr):
+        verify_cache.put(cache_key, stderr)
+
+
+def run_checks(directory, checks, fail_fast=False):
+    """Runs every check as soon as the checks it depends on have passed.
+
+    Parameters:
+    directory (str): artifact directory the errors and findings files are written to
+    checks (list): (name, function, args, dependencies) tuples
+    fail_fast (bool): stop the run at the first check that fails
+
+    Checks run in their own threads, so independent checks run concurrently.
+    A check that fails only stops the checks depending on it, unless
+    fail_fast is set, so that a single run reports every problem it can
+    find. The messages of all findings are written to the errors file, in the
+    order of checks, and the findings to findings.json. Exits with 1 when a
+    check failed.
+
+    Child processes started by the checks through run_child, the verifier
+    container for instance, are terminated when the run stops before they
+    finish.
+    """
+    results = queue.Queue()
+    children = ChildProcesses()
+    findings = {name: [] for name, _, _, _ in checks}
+    started = set()
+    passed = set()
+    failed = set()
+
+    def run(name, function, args):
+        CHECK_FINDINGS.findings = findings[name]
+        CHECK_FINDINGS.children = children
+        try:
+            function(*args)
+        except BaseException as err:
+            results.put((name, err))
+        else:
+            results.put((name, None))
+
+    def start_ready_checks():
+        for name, function, args, dependencies in checks:
+            if name not in started and passed.issuperset(dependencies):
+                started.add(name)
+                # Daemon threads do not keep a failed run waiting for the
+                # others, their child processes are terminated by the run
+                threading.Thread(target=run, args=(name, function, args), daemon=True).start()
+
+    def write_findings():
+        lines = [line for name, _, _, _ in checks for finding in findings[name] for line in finding.message.split("\n")]
+        if lines:
+            write_error_log(directory, *lines)
+        skipped = [name for name, _, _, _ in checks if name not in started]
+        out = {"findings": [dict(check=name, **asdict(finding)) for name, _, _, _ in checks for finding in findings[name]],
+               "failed": [name for name, _, _, _ in checks if name in failed],
+               "skipped": skipped}
+        with open(os.path.join(directory, FINDINGS_FILE), "w") as fd:
+            json.dump(out, fd, indent=2)
+        print(f"[INFO] Checks: {len(passed)} passed, {len(failed)} failed, {len(skipped)} skipped")
+
+    start_ready_checks()
+    try:
+        while len(passed) + len(failed) < len(started):
+            name, err = results.get()
+            if err is None:
+                passed.add(name)
+                start_ready_checks()
+                continue
+            failed.add(name)
+            if not isinstance(err, SystemExit):
+                write_findings()
+                raise err
+            if fail_fast:
+                break
+    finally:
+        children.terminate()
+    write_findings()
+    if failed:
+        sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser()
@@ -330,24 +574,49 @@ def main():
                                         help="check if the user can update the chart")
     parser.add_argument("-u", "--api-url", dest="api_url", type=str, required=True,
                                         help="API URL for the pull request")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                                        help="PR snapshot file written by pr-snapshot")
+    parser.add_argument("--fail-fast", dest="fail_fast", action="store_true",
+                                        help="stop at the first failed check instead of reporting all of them")
+    parser.add_argument("--static-only", dest="static_only", action="store_true",
+                                        help="only run the checks that do not need the verifier or the cluster")
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
     os.makedirs(args.directory, exist_ok=True)
     category, organization, chart, version = get_modified_charts(args.directory, args.api_url)
-    verify_user(args.directory, args.username, category, organization, chart)
-    check_owners_file_against_directory_structure(args.directory, args.username, category, organization, chart)
     submitted_report_path = os.path.join("charts", category, organization, chart, version, "report.yaml")
-    generate_verify_report(args.directory, category, organization, chart, version)
+    # The verifier generates a report when the chart source or tarball is submitted
+    chart_version = catalogue.scan_version(os.path.join("charts", category, organization, chart, version), chart, version)
+    report_generated = chart_version.has_source or chart_version.has_tarball
+
+    chart_args = (category, organization, chart, version)
+    checks = [
+        ("verify_user", verify_user, (args.directory, args.username, category, organization, chart), []),
+        ("owners", check_owners_file_against_directory_structure, (args.directory, args.username, category, organization, chart), []),
+        ("precheck", static_precheck, (args.directory, *chart_args), []),
+    ]
+    if args.static_only:
+        run_checks(args.directory, checks, args.fail_fast)
+        return
+
+    # Only the submitter needs to be verified before the signature and URL
+    # checks, only charts that pass the static checks are sent to the cluster
+    user_checks = ["verify_user"]
+    checks.append(("verify_report", generate_verify_report, (args.directory, *chart_args), ["verify_user", "owners", "precheck"]))
     if os.path.exists(submitted_report_path):
         print("[INFO] Report exists: ", submitted_report_path)
-        verify_signature(args.directory, category, organization, chart, version)
+        checks.append(("signature", verify_signature, (args.directory, *chart_args), user_checks))
         report_path = submitted_report_path
-        if os.path.exists("report.yaml"):
-            match_checksum(args.directory, category, organization, chart, version)
+        if report_generated:
+            checks.append(("checksum", match_checksum, (args.directory, *chart_args), ["verify_report"]))
         else:
-            check_url(args.directory, report_path)
+            checks.append(("url", check_url, (args.directory, report_path), user_checks))
     else:
         print("[INFO] Report does not exist: ", submitted_report_path)
         report_path = "report.yaml"
 
-    match_name_and_version(args.directory, category, organization, chart, version)
-    check_report_success(args.directory, args.api_url, report_path, version)
+    checks.append(("name_and_version", match_name_and_version, (args.directory, *chart_args), ["verify_report"]))
+    checks.append(("report_success", check_report_success, (args.directory, args.api_url, report_path, version),
+                   ["verify_report"]))
+    run_checks(args.directory, checks, args.fail_fast)
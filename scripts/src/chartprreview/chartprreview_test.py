@@ -1,8 +1,12 @@
 import os
+import json
+import threading
+import time
 import pytest
 from chartprreview.chartprreview import verify_user
 from chartprreview.chartprreview import check_owners_file_against_directory_structure
 from chartprreview.chartprreview import write_error_log
+from chartprreview.chartprreview import run_checks, add_finding, fail_check, WARNING
 
 def test_verify_user():
     with pytest.raises(SystemExit):
@@ -75,3 +79,95 @@ def test_write_error_log(tmpdir):
     write_error_log(tmpdir, "First message", "Second message")
     msg = open(os.path.join(tmpdir, "errors")).read()
     assert msg == "First message\nSecond message\n"
+
+def test_run_checks(tmpdir):
+    order = []
+    def first():
+        order.append("first")
+    def second():
+        order.append("second")
+    def warn():
+        add_finding(tmpdir, WARNING, "warn", "[WARNING] second message")
+    def fail():
+        fail_check(tmpdir, "fail", "[ERROR] failed")
+    def dependent():
+        order.append("dependent")
+    def independent():
+        fail_check(tmpdir, "other", "[ERROR] also failed")
+
+    run_checks(tmpdir, [("first", first, (), []), ("second", second, (), []),
+                        ("warn", warn, (), ["first", "second"])])
+    assert sorted(order) == ["first", "second"]
+    assert open(os.path.join(tmpdir, "errors")).read() == "[WARNING] second message\n"
+
+    # Every failure is reported, checks depending on a failed check are skipped
+    with pytest.raises(SystemExit):
+        run_checks(tmpdir, [("warn", warn, (), []), ("fail", fail, (), ["warn"]),
+                            ("dependent", dependent, (), ["fail"]), ("independent", independent, (), [])])
+    assert "dependent" not in order
+    assert open(os.path.join(tmpdir, "errors")).read() == "[WARNING] second message\n[ERROR] failed\n[ERROR] also failed\n"
+    findings = json.load(open(os.path.join(tmpdir, "findings.json")))
+    assert findings["failed"] == ["fail", "independent"]
+    assert findings["skipped"] == ["dependent"]
+    assert findings["findings"][1] == {"check": "fail", "severity": "error", "code": "fail", "message": "[ERROR] failed"}
+
+    with pytest.raises(SystemExit):
+        run_checks(tmpdir, [("fail", fail, (), []), ("dependent", dependent, (), ["fail"])], fail_fast=True)
+    assert open(os.path.join(tmpdir, "errors")).read() == "[ERROR] failed\n"
+
+def test_run_checks_terminates_child_processes(tmpdir):
+    from chartprreview.chartprreview import run_child
+    started = threading.Event()
+    outs = []
+    def verifier():
+        started.set()
+        outs.append(run_child(["sleep", "60"]))
+    def fail():
+        started.wait()
+        time.sleep(0.2)
+        fail_check(tmpdir, "fail", "[ERROR] failed")
+
+    begin = time.monotonic()
+    with pytest.raises(SystemExit):
+        run_checks(tmpdir, [("verifier", verifier, (), []), ("fail", fail, (), [])], fail_fast=True)
+    assert time.monotonic() - begin < 30
+    for _ in range(50):
+        if outs:
+            break
+        time.sleep(0.1)
+    assert outs[0].returncode != 0
+
+chart_yaml_without_kube_version = """\
+apiVersion: v2
+name: test-chart
+version: 0.1.0
+"""
+
+def test_static_precheck(tmpdir, monkeypatch):
+    import io
+    import tarfile
+    from chartprreview.chartprreview import static_precheck
+    monkeypatch.setenv("VENDOR_TYPE", "partner")
+    monkeypatch.chdir(tmpdir)
+    version_dir = tmpdir.mkdir("charts").mkdir("partners").mkdir("test-org").mkdir("test-chart").mkdir("0.1.0")
+    with tarfile.open(version_dir.join("test-chart-0.1.0.tgz"), "w:gz") as tar:
+        content = chart_yaml_without_kube_version.encode("utf-8")
+        info = tarfile.TarInfo("test-chart/Chart.yaml")
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    with pytest.raises(SystemExit):
+        run_checks(tmpdir, [("precheck", static_precheck, (tmpdir, "partners", "test-org", "test-chart", "0.1.0"), [])])
+    assert open(os.path.join(tmpdir, "errors")).read() == ("[ERROR] kubeVersion is not set in Chart.yaml\n"
+                                                           "[ERROR] values.schema.json is missing from the chart\n")
+
+    os.remove(version_dir.join("test-chart-0.1.0.tgz"))
+    src = version_dir.mkdir("src")
+    src.join("Chart.yaml").write(chart_yaml_without_kube_version + "kubeVersion: '>=1.20'\n")
+    src.join("values.schema.json").write("{}")
+    static_precheck(tmpdir, "partners", "test-org", "test-chart", "0.1.0")
+
+    # Versions are compared as written, 1.10 is not the float 1.1
+    src = tmpdir.join("charts", "partners", "test-org", "test-chart").mkdir("1.10").mkdir("src")
+    src.join("Chart.yaml").write(chart_yaml_without_kube_version.replace("0.1.0", "1.10") + "kubeVersion: '>=1.20'\n")
+    src.join("values.schema.json").write("{}")
+    static_precheck(tmpdir, "partners", "test-org", "test-chart", "1.10")
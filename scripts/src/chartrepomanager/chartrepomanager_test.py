@@ -0,0 +1,144 @@
+import hashlib
+import subprocess
+
+import pytest
+
+from chartrepomanager import chartrepomanager
+
+class FakeResponse:
+    def __init__(self, chunks, status_code=200, headers=None):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+def fake_get(monkeypatch, response):
+    monkeypatch.setattr(chartrepomanager.requests, "get", lambda url, **kwargs: response)
+
+def test_compute_package_digest(monkeypatch):
+    fake_get(monkeypatch, FakeResponse([b"chart ", b"package"]))
+    assert chartrepomanager.compute_package_digest("https://example.com/alpha-0.1.0.tgz") == \
+        hashlib.sha256(b"chart package").hexdigest()
+
+    fake_get(monkeypatch, FakeResponse([], status_code=404))
+    assert chartrepomanager.compute_package_digest("https://example.com/alpha-0.1.0.tgz") == ""
+
+def test_compute_package_digest_size_limit(monkeypatch):
+    monkeypatch.setenv("MAX_CHART_PACKAGE_SIZE", "8")
+    response = FakeResponse([b"chart ", b"package"], headers={"Content-Length": "13"})
+    fake_get(monkeypatch, response)
+    with pytest.raises(Exception, match=r"\(13 bytes\) exceeds the limit of 8 bytes"):
+        chartrepomanager.compute_package_digest("https://example.com/alpha-0.1.0.tgz")
+    assert response.read == 0
+
+    # Without Content-Length the download stops once the limit is crossed
+    response = FakeResponse([b"chart ", b"package", b"never read"])
+    fake_get(monkeypatch, response)
+    with pytest.raises(Exception, match="exceeds the limit of 8 bytes"):
+        chartrepomanager.compute_package_digest("https://example.com/alpha-0.1.0.tgz")
+    assert response.read == 2
+
+class FakeGit:
+    """Stands in for subprocess.run, answering git push with the scripted results."""
+
+    def __init__(self, pushes):
+        self.pushes = list(pushes)
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command[:2])
+        returncode, stderr = self.pushes.pop(0) if command[:2] == ["git", "push"] else (0, "")
+        return subprocess.CompletedProcess(command, returncode, b"", stderr.encode("utf-8"))
+
+    def count(self, subcommand):
+        return self.commands.count(["git", subcommand])
+
+REJECTED = " ! [rejected]        HEAD -> gh-pages ({})\nerror: failed to push some refs\n"
+
+def publish(indexdir, monkeypatch, git):
+    monkeypatch.setattr(chartrepomanager.subprocess, "run", git)
+    monkeypatch.setattr(chartrepomanager.time, "sleep", lambda delay: None)
+    entry = {"name": "alpha", "version": "0.1.0", "annotations": {}}
+    chartrepomanager.publish_index_entries(str(indexdir), "acme/charts", "gh-pages",
+                                           [("acme-alpha", "0.1.0", entry)], "acme-alpha-0.1.0 index.yaml")
+
+def test_publish_retries_rejected_push(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    git = FakeGit([(1, REJECTED.format("fetch first")), (1, REJECTED.format("non-fast-forward")), (0, "")])
+    publish(tmpdir, monkeypatch, git)
+    assert (git.count("push"), git.count("reset")) == (3, 2)
+    assert chartrepomanager.indexshards.read_versions(tmpdir) == {"acme-alpha": ["0.1.0"]}
+
+def test_publish_fails_at_once_on_other_errors(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    git = FakeGit([(128, "fatal: Authentication failed for 'https://github.com/acme/charts/'\n")])
+    with pytest.raises(SystemExit) as err:
+        publish(tmpdir, monkeypatch, git)
+    assert err.value.code == 1
+    assert (git.count("push"), git.count("reset")) == (1, 0)
+
+def test_publish_gives_up_after_the_last_attempt(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setenv("INDEX_PUSH_ATTEMPTS", "2")
+    git = FakeGit([(1, REJECTED.format("fetch first"))] * 2)
+    with pytest.raises(SystemExit) as err:
+        publish(tmpdir, monkeypatch, git)
+    assert err.value.code == 1
+    assert git.count("push") == 2
+
+    # At least one attempt is made
+    monkeypatch.setenv("INDEX_PUSH_ATTEMPTS", "0")
+    git = FakeGit([(1, REJECTED.format("fetch first"))])
+    with pytest.raises(SystemExit):
+        publish(tmpdir, monkeypatch, git)
+    assert git.count("push") == 1
+
+def test_read_batch_file(tmpdir):
+    batch = tmpdir.join("batch.yaml")
+    batch.write("- {category: partners, organization: acme, chart: alpha, version: 1.10}\n")
+    assert chartrepomanager.read_batch_file(str(batch)) == [
+        {"category": "partners", "organization": "acme", "chart": "alpha", "version": "1.10"}]
+
+    batch.write("- {category: partners, organization: acme, chart: alpha, version: 0.1.0}\n"
+                "- {category: partners, chart: beta}\n")
+    with pytest.raises(SystemExit) as err:
+        chartrepomanager.read_batch_file(str(batch))
+    assert err.value.code == 1
+
+def test_publish_batch_publishes_released_charts(tmpdir, monkeypatch):
+    batch = tmpdir.join("batch.yaml")
+    batch.write("- {category: partners, organization: acme, chart: alpha, version: 0.1.0}\n"
+                "- {category: partners, organization: acme, chart: beta, version: 0.1.0}\n"
+                "- {category: partners, organization: acme, chart: gamma, version: 0.2.0}\n")
+    def release(repository, commit_hash, item):
+        if item["chart"] == "beta":
+            raise Exception("Report not found")
+        return f"acme-{item['chart']}", item["version"], {"name": item["chart"]}
+    published = []
+    monkeypatch.setattr(chartrepomanager, "get_current_commit_sha", lambda: "abc")
+    monkeypatch.setattr(chartrepomanager, "create_worktree_for_index", lambda branch: str(tmpdir))
+    monkeypatch.setattr(chartrepomanager, "release_batch_chart", release)
+    monkeypatch.setattr(chartrepomanager, "publish_index_entries",
+                        lambda indexdir, repository, branch, entries, message: published.append(entries))
+
+    with pytest.raises(SystemExit) as err:
+        chartrepomanager.publish_batch("acme/charts", "gh-pages", str(batch))
+    assert err.value.code == 1
+    # Released charts are still published, in one index commit
+    assert published == [[("acme-alpha", "0.1.0", {"name": "alpha"}), ("acme-gamma", "0.2.0", {"name": "gamma"})]]
+
+    published.clear()
+    batch.write("- {category: partners, organization: acme, chart: alpha, version: 0.1.0}\n")
+    chartrepomanager.publish_batch("acme/charts", "gh-pages", str(batch))
+    assert published == [[("acme-alpha", "0.1.0", {"name": "alpha"})]]
@@ -0,0 +1,63 @@
+"""
+Layout of a helm repository index.yaml.
+
+The index is written by yaml.dump with sorted keys and block style, so every
+chart entry is a contiguous run of lines under "entries:", starting with a key
+line indented by two spaces. The entry blocks can be located and cut out of
+the text, or indented into it, without parsing the whole catalogue; the
+shards of indexshards are read and written this way.
+"""
+import re
+
+import yaml
+try:
+    from yaml import CDumper as Dumper
+except ImportError:
+    from yaml import Dumper
+
+ENTRIES_PATTERN = re.compile(r"^entries:(?: \{\})?\n", re.M)
+TOP_LEVEL_PATTERN = re.compile(r"^\S", re.M)
+ENTRY_KEY_PATTERN = re.compile(r"^  (?![ -])(.*):(?: \[\])?\n", re.M)
+
+
+def new_index(generated):
+    return yaml.dump({"apiVersion": "v1", "entries": {}, "generated": generated}, Dumper=Dumper)
+
+
+def indent_block(text):
+    return "".join("  " + line if line.strip() else line for line in text.splitlines(True))
+
+
+def dedent_block(text):
+    # Blank lines are left alone: inside a quoted scalar they stand for the
+    # line breaks of the string and are not indented
+    return "".join(line[2:] if line.startswith("  ") else line for line in text.splitlines(True))
+
+
+def entry_ranges(text):
+    """Locates the entry blocks of the index.
+
+    Returns the "entries:" match, the end of the entries section and a list of
+    (entry key, start, end) offsets, or None when the document does not have
+    the expected layout.
+    """
+    m = ENTRIES_PATTERN.search(text)
+    if not m:
+        return None
+    section_start = m.end()
+    top = TOP_LEVEL_PATTERN.search(text, section_start)
+    section_end = top.start() if top else len(text)
+
+    keys = list(ENTRY_KEY_PATTERN.finditer(text, section_start, section_end))
+    if keys and keys[0].start() != section_start:
+        return None
+    ranges = []
+    for i, key in enumerate(keys):
+        end = keys[i + 1].start() if i + 1 < len(keys) else section_end
+        ranges.append((key.group(1), key.start(), end))
+    return m, section_end, ranges
+
+
+def dump_entry(entry_name, versions):
+    """Returns the entry as it appears under "entries:" in the index."""
+    return indent_block(yaml.dump({entry_name: versions}, Dumper=Dumper))
@@ -0,0 +1,40 @@
+import yaml
+try:
+    from yaml import CLoader as Loader, CDumper as Dumper
+except ImportError:
+    from yaml import Loader, Dumper
+
+from chartrepomanager import indexfile
+
+def make_entry(name, version):
+    return {"name": name, "version": version, "urls": [f"https://example.com/{name}-{version}.tgz"],
+            "description": "A chart with a fairly long description that the emitter has to wrap over several lines",
+            "annotations": {"charts.openshift.io/provider": "Example"}}
+
+def make_index():
+    return {"apiVersion": "v1",
+            "entries": {"acme-alpha": [make_entry("alpha", "1.0.0")],
+                        "acme-gamma": [make_entry("gamma", "1.0.0"), make_entry("gamma", "1.1.0")]},
+            "generated": "2021-01-01T00:00:00+00:00"}
+
+def test_entry_ranges():
+    data = make_index()
+    text = yaml.dump(data, Dumper=Dumper)
+    _, _, ranges = indexfile.entry_ranges(text)
+    assert [key for key, _, _ in ranges] == ["acme-alpha", "acme-gamma"]
+    for key, start, end in ranges:
+        assert text[start:end] == indexfile.dump_entry(key, data["entries"][key])
+
+    _, _, ranges = indexfile.entry_ranges(indexfile.new_index("2021-01-01T00:00:00+00:00"))
+    assert ranges == []
+
+def test_multi_line_description_round_trip():
+    data = make_index()
+    data["entries"]["acme-alpha"][0]["description"] = "Line one.\nLine two.\n\nSecond paragraph."
+    data["entries"]["acme-gamma"][1]["annotations"]["charts.openshift.io/notes"] = "First.\nSecond."
+    text = yaml.dump(data, Dumper=Dumper)
+    _, _, ranges = indexfile.entry_ranges(text)
+    for key, start, end in ranges:
+        block = indexfile.dedent_block(text[start:end])
+        assert yaml.load(block, Loader=Loader) == {key: data["entries"][key]}
+        assert indexfile.indent_block(block) == text[start:end]
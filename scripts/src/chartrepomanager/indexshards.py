@@ -0,0 +1,168 @@
+"""
+Sharded storage of the helm repository index on the index branch.
+
+Every chart entry is kept in its own file, index.d/<organization>-<chart>.yaml,
+which is the source of truth. The aggregate index.yaml served to helm clients
+and a manifest with the digest of every shard are generated from the shards by
+concatenating their text, without parsing any YAML.
+
+The top-level keys of the index other than apiVersion, entries and generated,
+serverInfo or annotations for instance, are kept in index.d/header.yaml and
+carried through to index.yaml.
+
+index.d/versions.json maps every entry to its published versions so that
+checks for an existing chart version only need that one small file. It is
+updated along with each shard.
+"""
+import hashlib
+import json
+import os
+
+import yaml
+try:
+    from yaml import CLoader as Loader, CDumper as Dumper
+except ImportError:
+    from yaml import Loader, Dumper
+
+from chartrepomanager import indexfile
+
+SHARDS_DIRECTORY = "index.d"
+SHARD_SUFFIX = ".yaml"
+MANIFEST_FILE = "manifest.json"
+VERSIONS_FILE = "versions.json"
+INDEX_FILE = "index.yaml"
+# Entry names are <organization>-<chart>, so the header cannot clash with a shard
+HEADER_FILE = "header.yaml"
+# Top-level keys written by merge itself
+GENERATED_KEYS = ("apiVersion", "entries", "generated")
+
+
+def shard_path(indexdir, entry_name):
+    return os.path.join(indexdir, SHARDS_DIRECTORY, entry_name + SHARD_SUFFIX)
+
+
+def has_shards(indexdir):
+    return os.path.isdir(os.path.join(indexdir, SHARDS_DIRECTORY))
+
+
+def list_shards(indexdir):
+    names = []
+    with os.scandir(os.path.join(indexdir, SHARDS_DIRECTORY)) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(SHARD_SUFFIX) and entry.name != HEADER_FILE:
+                names.append(entry.name[:-len(SHARD_SUFFIX)])
+    return sorted(names)
+
+
+def read_shard(indexdir, entry_name):
+    """Returns the list of chart versions of entry_name."""
+    try:
+        with open(shard_path(indexdir, entry_name)) as fd:
+            data = yaml.load(fd, Loader=Loader)
+    except FileNotFoundError:
+        return []
+    return data[entry_name] or []
+
+
+def write_shard(indexdir, entry_name, versions):
+    os.makedirs(os.path.join(indexdir, SHARDS_DIRECTORY), exist_ok=True)
+    with open(shard_path(indexdir, entry_name), "w") as fd:
+        fd.write(yaml.dump({entry_name: versions}, Dumper=Dumper))
+
+    lookup = read_versions(indexdir)
+    if lookup is None:
+        lookup = {name: [v["version"] for v in read_shard(indexdir, name)] for name in list_shards(indexdir)}
+    lookup[entry_name] = [v["version"] for v in versions]
+    write_versions(indexdir, lookup)
+
+
+def read_versions(indexdir):
+    try:
+        with open(os.path.join(indexdir, SHARDS_DIRECTORY, VERSIONS_FILE)) as fd:
+            return json.load(fd)
+    except FileNotFoundError:
+        return None
+
+
+def write_versions(indexdir, lookup):
+    with open(os.path.join(indexdir, SHARDS_DIRECTORY, VERSIONS_FILE), "w") as fd:
+        json.dump({name: sorted(versions) for name, versions in lookup.items()}, fd, separators=(",", ":"), sort_keys=True)
+
+
+def read_header(indexdir):
+    """Returns the top-level keys of the index that are carried through by merge."""
+    try:
+        with open(os.path.join(indexdir, SHARDS_DIRECTORY, HEADER_FILE)) as fd:
+            return yaml.load(fd, Loader=Loader) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def write_header(indexdir, data):
+    header = {key: value for key, value in data.items() if key not in GENERATED_KEYS}
+    with open(os.path.join(indexdir, SHARDS_DIRECTORY, HEADER_FILE), "w") as fd:
+        fd.write(yaml.dump(header, Dumper=Dumper))
+
+
+def split_index(indexdir, text):
+    """Creates one shard per entry of an existing index.yaml, and the header."""
+    os.makedirs(os.path.join(indexdir, SHARDS_DIRECTORY), exist_ok=True)
+    lookup = {}
+    located = indexfile.entry_ranges(text)
+    if located is None:
+        data = yaml.load(text, Loader=Loader)
+        write_header(indexdir, data)
+        for entry_name, versions in data["entries"].items():
+            with open(shard_path(indexdir, entry_name), "w") as fd:
+                fd.write(yaml.dump({entry_name: versions}, Dumper=Dumper))
+            lookup[entry_name] = [v["version"] for v in versions or []]
+    else:
+        m, section_end, ranges = located
+        # The rest of the document, without the entries section
+        write_header(indexdir, yaml.load(text[:m.start()] + text[section_end:], Loader=Loader) or {})
+        for key, start, end in ranges:
+            entry_name = yaml.load(key, Loader=Loader)
+            shard = indexfile.dedent_block(text[start:end])
+            with open(shard_path(indexdir, entry_name), "w") as fd:
+                fd.write(shard)
+            versions = yaml.load(shard, Loader=Loader)[entry_name] or []
+            lookup[entry_name] = [v["version"] for v in versions]
+    write_versions(indexdir, lookup)
+
+
+def merge(indexdir, generated):
+    """Writes index.yaml and the shard manifest from the shards.
+
+    Returns the paths of the generated files.
+    """
+    digests = {}
+    index_path = os.path.join(indexdir, INDEX_FILE)
+    index_sha = hashlib.sha256()
+    with open(index_path, "w") as out:
+        def write(text):
+            out.write(text)
+            index_sha.update(text.encode("utf-8"))
+
+        # Keys are written in the sorted order of a dump of the whole index
+        header = read_header(indexdir)
+        before = {key: value for key, value in header.items() if key < "entries"}
+        after = {key: value for key, value in header.items() if key > "entries"}
+        write(yaml.dump({"apiVersion": "v1", **before}, Dumper=Dumper))
+        names = list_shards(indexdir)
+        write("entries:\n" if names else "entries: {}\n")
+        for entry_name in names:
+            with open(shard_path(indexdir, entry_name)) as fd:
+                shard = fd.read()
+            digests[entry_name] = "sha256:" + hashlib.sha256(shard.encode("utf-8")).hexdigest()
+            write(indexfile.indent_block(shard))
+        write(yaml.dump({"generated": generated, **after}, Dumper=Dumper))
+
+    manifest_path = os.path.join(indexdir, SHARDS_DIRECTORY, MANIFEST_FILE)
+    manifest = {"generated": generated,
+                "index": "sha256:" + index_sha.hexdigest(),
+                "entries": digests}
+    with open(manifest_path, "w") as fd:
+        json.dump(manifest, fd, indent=2, sort_keys=True)
+        fd.write("\n")
+
+    return [index_path, manifest_path]
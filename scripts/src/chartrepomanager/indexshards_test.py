@@ -0,0 +1,63 @@
+import json
+import os
+
+import yaml
+try:
+    from yaml import CLoader as Loader, CDumper as Dumper
+except ImportError:
+    from yaml import Loader, Dumper
+
+from chartrepomanager import indexshards
+
+def make_entry(name, version):
+    return {"name": name, "version": version, "urls": [f"https://example.com/{name}-{version}.tgz"],
+            "description": "A chart with a fairly long description that the emitter has to wrap over several lines",
+            "annotations": {"charts.openshift.io/provider": "Example"}}
+
+def make_index():
+    return {"apiVersion": "v1",
+            "entries": {"acme-alpha": [make_entry("alpha", "1.0.0")],
+                        "acme-gamma": [make_entry("gamma", "1.0.0"), make_entry("gamma", "1.1.0")]},
+            "generated": "2021-01-01T00:00:00+00:00"}
+
+def test_split_and_merge_round_trip(tmpdir):
+    data = make_index()
+    indexshards.split_index(tmpdir, yaml.dump(data, Dumper=Dumper))
+    assert indexshards.list_shards(tmpdir) == ["acme-alpha", "acme-gamma"]
+    assert indexshards.read_shard(tmpdir, "acme-gamma") == data["entries"]["acme-gamma"]
+
+    paths = indexshards.merge(tmpdir, data["generated"])
+    assert open(paths[0]).read() == yaml.dump(data, Dumper=Dumper)
+    manifest = json.load(open(paths[1]))
+    assert sorted(manifest["entries"]) == ["acme-alpha", "acme-gamma"]
+    assert indexshards.read_versions(tmpdir) == {"acme-alpha": ["1.0.0"], "acme-gamma": ["1.0.0", "1.1.0"]}
+
+def test_write_shard_and_merge(tmpdir):
+    generated = "2021-02-02T00:00:00+00:00"
+    indexshards.write_shard(tmpdir, "acme-beta", [make_entry("beta", "0.1.0")])
+    paths = indexshards.merge(tmpdir, generated)
+    assert yaml.load(open(paths[0]), Loader=Loader) == {
+        "apiVersion": "v1",
+        "entries": {"acme-beta": [make_entry("beta", "0.1.0")]},
+        "generated": generated}
+    assert indexshards.read_versions(tmpdir) == {"acme-beta": ["0.1.0"]}
+
+def test_merge_keeps_unknown_top_level_keys(tmpdir):
+    data = make_index()
+    data["annotations"] = {"owner": "acme"}
+    data["serverInfo"] = {"contextPath": "/charts"}
+    indexshards.split_index(tmpdir, yaml.dump(data, Dumper=Dumper))
+    assert indexshards.list_shards(tmpdir) == ["acme-alpha", "acme-gamma"]
+
+    paths = indexshards.merge(tmpdir, data["generated"])
+    assert open(paths[0]).read() == yaml.dump(data, Dumper=Dumper)
+
+def test_split_and_merge_keep_multi_line_strings(tmpdir):
+    data = make_index()
+    data["entries"]["acme-alpha"][0]["description"] = "Line one.\nLine two.\n\nSecond paragraph."
+    data["entries"]["acme-gamma"][1]["annotations"]["charts.openshift.io/notes"] = "First.\nSecond."
+    indexshards.split_index(tmpdir, yaml.dump(data, Dumper=Dumper))
+    assert indexshards.read_shard(tmpdir, "acme-alpha") == data["entries"]["acme-alpha"]
+
+    paths = indexshards.merge(tmpdir, data["generated"])
+    assert yaml.load(open(paths[0]), Loader=Loader)["entries"] == data["entries"]
@@ -1,27 +1,70 @@
+import os
 import time
 import sys
 import argparse
 
-import requests
+sys.path.append('../')
+from github import httpcache
 
-def ensure_pull_request_not_merged(api_url):
-    # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
+DEFAULT_TIMEOUT = 200
+INITIAL_POLL_INTERVAL = 1
+MAX_POLL_INTERVAL = 15
+SIGNAL_CHECK_INTERVAL = 0.2
+
+def is_pull_request_merged(session, api_url):
     headers = {'Accept': 'application/vnd.github.v3+json'}
-    merged = False
-    for i in range(20):
-        r = requests.get(api_url, headers=headers)
-        if r.json()["merged"]:
-            merged = True
+    r = session.get(api_url, headers=headers)
+    return r.json()["merged"]
+
+def wait_for_signal(signal_file, timeout):
+    """
+    Waits up to timeout seconds for signal_file to be created, by the merge step
+    or a webhook relay. The signal is consumed, returns True if it was received.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if os.path.exists(signal_file):
+            try:
+                os.remove(signal_file)
+            except FileNotFoundError:
+                pass
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(SIGNAL_CHECK_INTERVAL, remaining))
+
+def ensure_pull_request_not_merged(api_url, signal_file=None, timeout=DEFAULT_TIMEOUT):
+    # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
+    # Polls start right away and back off exponentially. They are conditional
+    # requests, a pull request that did not change does not use the rate limit.
+    session = httpcache.get_session()
+    deadline = time.monotonic() + timeout
+    interval = INITIAL_POLL_INTERVAL
+    while True:
+        if is_pull_request_merged(session, api_url):
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
             break
-        time.sleep(10)
+        wait = min(interval, remaining)
+        if signal_file:
+            if wait_for_signal(signal_file, wait):
+                print("[INFO] Merge signal received")
+        else:
+            time.sleep(wait)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
 
-    if not merged:
-        print("[ERROR] Pull request not merged")
-        sys.exit(1)
+    print("[ERROR] Pull request not merged")
+    sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("-u", "--api-url", dest="api_url", type=str, required=True,
                                         help="API URL for the pull request")
+    parser.add_argument("-s", "--signal-file", dest="signal_file", type=str, required=False,
+                                        help="file whose creation signals that the pull request was merged")
+    parser.add_argument("-t", "--timeout", dest="timeout", type=int, required=False, default=DEFAULT_TIMEOUT,
+                                        help="seconds to wait for the merge")
     args = parser.parse_args()
-    ensure_pull_request_not_merged(args.api_url)
+    ensure_pull_request_not_merged(args.api_url, args.signal_file, args.timeout)
@@ -0,0 +1,180 @@
+"""
+GitHub API session with conditional requests and rate limit pacing.
+
+Successful GET responses that carry an ETag or Last-Modified header are kept on
+disk under CHARTS_CACHE_DIR, and the next GET of the same URL is sent with
+If-None-Match / If-Modified-Since. GitHub does not count 304 responses against
+the rate limit; the cached response is returned in their place.
+
+The rate limit headers of every response are used to pace the requests:
+- below GITHUB_RATE_LIMIT_RESERVE remaining requests, the remaining ones are
+  spread over the time left until the limit resets
+- once the limit is exhausted, or on a secondary rate limit (Retry-After), the
+  request is retried after the advertised delay
+- requests that modify data are at least MUTATION_INTERVAL seconds apart, as
+  GitHub recommends to avoid secondary rate limits
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append('../')
+from cachedir import cachedir
+
+CACHE_DIRECTORY = "github"
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_RATE_LIMIT_RESERVE = 100
+MUTATION_INTERVAL = 1.0
+MAX_RATE_LIMIT_RETRIES = 5
+MAX_RATE_LIMIT_WAIT = 15 * 60
+MUTATING_METHODS = ("POST", "PATCH", "PUT", "DELETE")
+# Headers of a 304 response that replace the cached ones
+REFRESHED_HEADERS = ("Date", "ETag", "Last-Modified", "X-RateLimit-Limit", "X-RateLimit-Remaining",
+                     "X-RateLimit-Reset", "X-RateLimit-Used")
+
+
+class CachingSession(requests.Session):
+
+    def __init__(self):
+        super().__init__()
+        self.directory = cachedir.get_cache_directory(CACHE_DIRECTORY)
+        self.reserve = int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", DEFAULT_RATE_LIMIT_RESERVE))
+        self.lock = threading.Lock()
+        self.not_before = 0.0
+        self.last_mutation = 0.0
+
+    def request(self, method, url, **kwargs):
+        method = method.upper()
+        cacheable = method == "GET" and not kwargs.get("stream")
+        entry = None
+        if cacheable:
+            key = self._cache_key(url, kwargs.get("params"), kwargs.get("headers"))
+            entry = self._read_entry(key)
+            if entry:
+                headers = dict(kwargs.get("headers") or {})
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+                kwargs["headers"] = headers
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self._wait(method)
+            response = super().request(method, url, **kwargs)
+            delay = self._update_pace(response)
+            if delay is None or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            print(f"[INFO] GitHub rate limit reached, retrying in {delay:.0f}s: {method} {url}")
+            time.sleep(delay)
+
+        if entry and response.status_code == 304:
+            return self._cached_response(entry, response)
+        if cacheable and response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            self._write_entry(key, response)
+        return response
+
+    def _cache_key(self, url, params, headers):
+        request = requests.Request("GET", url, params=params).prepare()
+        merged = requests.sessions.merge_setting(headers, self.headers, dict_class=CaseInsensitiveDict)
+        # Responses depend on the media type and on what the token is allowed to see
+        vary = "\0".join([request.url, merged.get("Accept") or "", merged.get("Authorization") or ""])
+        return hashlib.sha256(vary.encode("utf-8")).hexdigest()
+
+    def _read_entry(self, key):
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(path) as fd:
+                entry = json.load(fd)
+        except (OSError, ValueError):
+            return None
+        # Mark the entry as recently used
+        os.utime(path)
+        return entry
+
+    def _write_entry(self, key, response):
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "content": response.content.decode("latin-1"),
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as out:
+            json.dump(entry, out)
+        os.replace(tmp, os.path.join(self.directory, f"{key}.json"))
+        cachedir.evict(self.directory, int(os.environ.get("GITHUB_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+
+    def _cached_response(self, entry, not_modified):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        for name in REFRESHED_HEADERS:
+            if name in not_modified.headers:
+                response.headers[name] = not_modified.headers[name]
+        response.encoding = entry["encoding"]
+        response._content = entry["content"].encode("latin-1")
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.from_cache = True
+        return response
+
+    def _wait(self, method):
+        with self.lock:
+            now = time.time()
+            start = max(now, self.not_before)
+            if method in MUTATING_METHODS:
+                start = max(start, self.last_mutation + MUTATION_INTERVAL)
+                self.last_mutation = start
+        if start > now:
+            time.sleep(start - now)
+
+    def _update_pace(self, response):
+        """Schedules the next request from the rate limit headers.
+
+        Returns the delay after which the request must be retried, or None
+        when the response is final.
+        """
+        headers = response.headers
+        now = time.time()
+        if response.status_code in (403, 429):
+            if "Retry-After" in headers:
+                return min(float(headers["Retry-After"]), MAX_RATE_LIMIT_WAIT)
+            if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+                return min(max(float(headers["X-RateLimit-Reset"]) - now, 0) + 1, MAX_RATE_LIMIT_WAIT)
+            return None
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return None
+        remaining = int(remaining)
+        window = max(float(reset) - now, 0)
+        if remaining < self.reserve:
+            interval = window / max(remaining, 1)
+            with self.lock:
+                self.not_before = max(self.not_before, now + min(interval, MAX_RATE_LIMIT_WAIT))
+        return None
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Returns the session shared by the whole process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = CachingSession()
+        return _session
@@ -0,0 +1,46 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from github import httpcache
+
+
+def make_response(status_code, content=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = "utf-8"
+    return response
+
+
+def test_not_modified_is_served_from_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHARTS_CACHE_DIR", str(tmp_path))
+    sent = []
+    responses = [
+        make_response(200, b'{"merged": false}', {"ETag": '"abc"'}),
+        make_response(304, headers={"ETag": '"abc"', "X-RateLimit-Remaining": "4999"}),
+    ]
+
+    def request(self, method, url, **kwargs):
+        sent.append(kwargs.get("headers") or {})
+        return responses.pop(0)
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    session = httpcache.CachingSession()
+    assert session.get("https://api.github.com/repos/o/r/pulls/1").json() == {"merged": False}
+    r = session.get("https://api.github.com/repos/o/r/pulls/1")
+    assert sent[1]["If-None-Match"] == '"abc"'
+    assert r.status_code == 200
+    assert r.json() == {"merged": False}
+    assert r.headers["X-RateLimit-Remaining"] == "4999"
+
+
+def test_secondary_rate_limit_is_retried(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHARTS_CACHE_DIR", str(tmp_path))
+    responses = [make_response(403, headers={"Retry-After": "3"}), make_response(201)]
+    sleeps = []
+    monkeypatch.setattr(requests.Session, "request", lambda self, method, url, **kwargs: responses.pop(0))
+    monkeypatch.setattr(httpcache.time, "sleep", sleeps.append)
+    session = httpcache.CachingSession()
+    assert session.post("https://api.github.com/repos/o/r/issues").status_code == 201
+    assert 3 in sleeps
@@ -0,0 +1,105 @@
+"""
+Read access to pull requests through the GitHub REST API.
+
+Every request goes through one pooled session, so an entry point keeps a
+single keep-alive connection to the API however many pages it reads. The
+session sends conditional requests and paces itself on the rate limit, see
+github.httpcache.
+
+A workflow can fetch the pull request once with the pr-snapshot command and
+pass the file to the other entry points with --snapshot: after load_snapshot
+the pull request in the file is served from memory.
+
+main functions :
+- get_pr - returns the pull request
+- get_labels - returns the labels of the pull request
+- get_files - iterates over the files of the pull request
+- make_snapshot, save_snapshot, load_snapshot - snapshot of a pull request
+"""
+import json
+import os
+import tempfile
+import threading
+
+from github import httpcache
+
+HEADERS = {'Accept': 'application/vnd.github.v3+json'}
+FILES_PER_PAGE = 100
+# The patch of every file is not needed by the scripts and makes up most of the file list
+SNAPSHOT_FILE_FIELDS = ("filename", "status", "sha", "previous_filename")
+
+SNAPSHOTS = {}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = httpcache.CachingSession()
+            _session.headers.update(HEADERS)
+        return _session
+
+
+def get_pr(api_url):
+    """
+    Parameters:
+    api_url (str): https://api.github.com/repos/<organization-name>/<repository-name>/pulls/<pr_number>
+    """
+    if api_url in SNAPSHOTS:
+        return SNAPSHOTS[api_url]["pr"]
+    r = get_session().get(api_url)
+    r.raise_for_status()
+    return r.json()
+
+
+def get_labels(api_url):
+    return get_pr(api_url)["labels"]
+
+
+def get_files(api_url):
+    """
+    Yields the files of the pull request. Pages are requested as they are
+    consumed, following the Link header, so callers that stop early do not
+    download the remaining pages.
+    """
+    if api_url in SNAPSHOTS:
+        yield from SNAPSHOTS[api_url]["files"]
+        return
+    url = f'{api_url}/files?per_page={FILES_PER_PAGE}'
+    while url:
+        r = get_session().get(url)
+        r.raise_for_status()
+        yield from r.json()
+        url = r.links.get("next", {}).get("url")
+
+
+def make_snapshot(api_url):
+    files = [{k: f[k] for k in SNAPSHOT_FILE_FIELDS if k in f} for f in get_files(api_url)]
+    return {"api_url": api_url, "pr": get_pr(api_url), "files": files}
+
+
+def save_snapshot(snapshot, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as out:
+        json.dump(snapshot, out, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_snapshot(path):
+    """Serves the pull request in the snapshot from memory.
+
+    A missing snapshot is not an error, the pull request is then read from
+    the API.
+    """
+    try:
+        with open(path) as fd:
+            snapshot = json.load(fd)
+    except FileNotFoundError:
+        print(f"[WARNING] PR snapshot not found: {path}")
+        return None
+    SNAPSHOTS[snapshot["api_url"]] = snapshot
+    return snapshot
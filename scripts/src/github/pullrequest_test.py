@@ -0,0 +1,63 @@
+from github import pullrequest
+
+
+class FakeResponse:
+
+    def __init__(self, files, next_url=None):
+        self.files = files
+        self.links = {"next": {"url": next_url}} if next_url else {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.files
+
+
+class FakeSession:
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url):
+        self.requested.append(url)
+        return self.pages[url]
+
+
+def test_get_files_follows_next_link(monkeypatch):
+    api_url = "https://api.github.com/repos/o/r/pulls/1"
+    session = FakeSession({
+        f"{api_url}/files?per_page=100": FakeResponse([{"filename": "a"}], f"{api_url}/files?per_page=100&page=2"),
+        f"{api_url}/files?per_page=100&page=2": FakeResponse([{"filename": "b"}]),
+    })
+    monkeypatch.setattr(pullrequest, "get_session", lambda: session)
+    assert [f["filename"] for f in pullrequest.get_files(api_url)] == ["a", "b"]
+
+
+def test_get_files_is_lazy(monkeypatch):
+    api_url = "https://api.github.com/repos/o/r/pulls/1"
+    session = FakeSession({
+        f"{api_url}/files?per_page=100": FakeResponse([{"filename": "a"}], f"{api_url}/files?per_page=100&page=2"),
+    })
+    monkeypatch.setattr(pullrequest, "get_session", lambda: session)
+    assert next(pullrequest.get_files(api_url))["filename"] == "a"
+    assert len(session.requested) == 1
+
+
+def test_snapshot_is_served_without_requests(monkeypatch, tmp_path):
+    api_url = "https://api.github.com/repos/o/r/pulls/2"
+    session = FakeSession({
+        api_url: FakeResponse({"number": 2, "labels": [{"name": "force-publish"}]}),
+        f"{api_url}/files?per_page=100": FakeResponse([{"filename": "a", "status": "added", "patch": "@@ -0,0 +1 @@"}]),
+    })
+    monkeypatch.setattr(pullrequest, "get_session", lambda: session)
+    monkeypatch.setattr(pullrequest, "SNAPSHOTS", {})
+    path = tmp_path / "pr-snapshot.json"
+    pullrequest.save_snapshot(pullrequest.make_snapshot(api_url), str(path))
+    requested = len(session.requested)
+
+    pullrequest.load_snapshot(str(path))
+    assert pullrequest.get_labels(api_url) == [{"name": "force-publish"}]
+    assert list(pullrequest.get_files(api_url)) == [{"filename": "a", "status": "added"}]
+    assert len(session.requested) == requested
@@ -12,7 +12,6 @@ results:
 
 import re
 import argparse
-import requests
 import os
 import sys
 import yaml
@@ -21,6 +20,8 @@ try:
 except ImportError:
     from yaml import Loader, Dumper
 
+sys.path.append('../')
+from github import pullrequest
 
 OWNERS_FILE = "OWNERS"
 VERSION_FILE = "release/release_info.json"
@@ -42,27 +43,15 @@ def verify_user(username):
     return False
 
 def check_for_restricted_file(api_url):
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
     pattern_owners = re.compile(OWNERS_FILE)
     pattern_versionfile = re.compile(VERSION_FILE)
     pattern_thisfile = re.compile(THIS_FILE)
-    page_number = 1
-    max_page_size,page_size = 100,100
 
-    while (page_size == max_page_size):
-
-        files_api_query = f'{files_api_url}?per_page={page_size}&page={page_number}'
-        r = requests.get(files_api_query,headers=headers)
-        files = r.json()
-        page_size = len(files)
-        page_number += 1
-
-        for f in files:
-           filename = f["filename"]
-           if pattern_versionfile.match(filename) or pattern_owners.match(filename) or pattern_thisfile.match(filename):
-               print(f"[INFO] restricted file found: {filename}")
-               return True
+    for f in pullrequest.get_files(api_url):
+        filename = f["filename"]
+        if pattern_versionfile.match(filename) or pattern_owners.match(filename) or pattern_thisfile.match(filename):
+            print(f"[INFO] restricted file found: {filename}")
+            return True
  
     return False
 
@@ -73,7 +62,11 @@ def main():
                         help="API URL for the pull request")
     parser.add_argument("-u", "--user", dest="username", type=str, required=True,
                         help="user to be checked for authority to modify release files in a PR")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                        help="PR snapshot file written by pr-snapshot")
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
 
     if check_for_restricted_file(args.api_url):
         if verify_user(args.username):
@@ -5,16 +5,14 @@ import argparse
 import shutil
 import pathlib
 
-import requests
+sys.path.append('../')
+from github import pullrequest
 
 # TODO(baijum): Move this code under chartsubmission.chart module
 def get_modified_charts(api_url):
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    r = requests.get(files_api_url, headers=headers)
     pattern = re.compile(r"charts/(\w+)/([\w-]+)/([\w-]+)/([\w\.]+)/.*")
     count = 0
-    for f in r.json():
+    for f in pullrequest.get_files(api_url):
         m = pattern.match(f["filename"])
         if m:
             category, organization, chart, version = m.groups()
@@ -46,7 +44,11 @@ def main():
                                         help="current pull request number")
     parser.add_argument("-u", "--api-url", dest="api_url", type=str, required=True,
                                         help="API URL for the pull request")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                                        help="PR snapshot file written by pr-snapshot")
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
     os.makedirs(args.directory, exist_ok=True)
     category, organization, chart, version = get_modified_charts(args.api_url)
     save_metadata(args.directory, organization, chart, args.number)
@@ -0,0 +1,21 @@
+import sys
+import argparse
+
+sys.path.append('../')
+from github import pullrequest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-u", "--api-url", dest="api_url", type=str, required=True,
+                                        help="API URL for the pull request")
+    parser.add_argument("-o", "--output", dest="output", type=str, required=True,
+                                        help="path of the snapshot file to write")
+    args = parser.parse_args()
+    snapshot = pullrequest.make_snapshot(args.api_url)
+    pullrequest.save_snapshot(snapshot, args.output)
+    print(f"[INFO] PR snapshot with {len(snapshot['files'])} files written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
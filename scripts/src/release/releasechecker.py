@@ -27,7 +27,6 @@ import re
 import os
 import argparse
 import json
-import requests
 import semver
 import sys
 from release import release_info
@@ -35,34 +34,20 @@ from release import releaser
 
 sys.path.append('../')
 from owners import checkuser
+from github import pullrequest
 
 VERSION_FILE = "release/release_info.json"
 TYPE_MATCH_EXPRESSION = "(partners|redhat|community)"
 
 def check_if_only_charts_are_included(api_url):
 
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
     chart_pattern = re.compile(r"charts/"+TYPE_MATCH_EXPRESSION+"/([\w-]+)/([\w-]+)/([\w\.-]+)/.*")
-    page_number = 1
-    max_page_size,page_size = 100,100
-    file_count = 0
-
-    while page_size == max_page_size:
-
-        files_api_query = f'{files_api_url}?per_page={page_size}&page={page_number}'
-        print(f"Query files : {files_api_query}")
-        pr_files = requests.get(files_api_query,headers=headers)
-        files = pr_files.json()
-        page_size = len(files)
-        file_count += page_size
-        page_number += 1
-
-        for f in files:
-            file_path = f["filename"]
-            match = chart_pattern.match(file_path)
-            if not match:
-                return False
+
+    for f in pullrequest.get_files(api_url):
+        file_path = f["filename"]
+        match = chart_pattern.match(file_path)
+        if not match:
+            return False
 
     return True
 
@@ -70,27 +55,15 @@ def check_if_only_charts_are_included(api_url):
 def check_if_only_version_file_is_modified(api_url):
     # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/<pr_number>
 
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
     pattern_versionfile = re.compile(r"release/release_info.json")
-    page_number = 1
-    max_page_size,page_size = 100,100
 
     version_file_found = False
-    while (page_size == max_page_size):
-
-        files_api_query = f'{files_api_url}?per_page={page_size}&page={page_number}'
-        r = requests.get(files_api_query,headers=headers)
-        files = r.json()
-        page_size = len(files)
-        page_number += 1
-
-        for f in files:
-            filename = f["filename"]
-            if pattern_versionfile.match(filename):
-                version_file_found = True
-            else:
-                return False
+    for f in pullrequest.get_files(api_url):
+        filename = f["filename"]
+        if pattern_versionfile.match(filename):
+            version_file_found = True
+        else:
+            return False
 
     return version_file_found
 
@@ -144,8 +117,12 @@ def main():
                         help="PR branch name")
     parser.add_argument("-t", "--pr_body", dest="pr_body", type=str, required=False,
                         help="PR title")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                        help="PR snapshot file written by pr-snapshot")
 
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
 
     print(f"[INFO] arg api-url : {args.api_url}")
     print(f"[INFO] arg version : {args.version}")
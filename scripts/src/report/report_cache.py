@@ -0,0 +1,51 @@
+"""
+On-disk cache for the answers computed by the chart verifier.
+
+A verifier report query is a pure function of the report content, the query
+and the verifier image, so entries are keyed by the SHA-256 of all of them.
+Entries live in the CHARTS_CACHE_DIR shared by every script and are kept under
+REPORT_CACHE_MAX_BYTES by evicting the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append('../')
+from cachedir import cachedir
+
+CACHE_DIRECTORY = "report-info"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def make_key(report_path, info_type, profile_type, profile_version, image_digest):
+    sha = hashlib.sha256()
+    with open(report_path, "rb") as fd:
+        for chunk in iter(lambda: fd.read(65536), b""):
+            sha.update(chunk)
+    report_digest = sha.hexdigest()
+    query = "\0".join([report_digest, info_type, profile_type or "", profile_version or "", image_digest])
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get(key):
+    path = os.path.join(cachedir.get_cache_directory(CACHE_DIRECTORY), f"{key}.json")
+    try:
+        with open(path) as fd:
+            value = json.load(fd)
+    except (OSError, ValueError):
+        return None
+    # Mark the entry as recently used
+    os.utime(path)
+    return value
+
+
+def put(key, value):
+    directory = cachedir.get_cache_directory(CACHE_DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as out:
+        json.dump(value, out)
+    os.replace(tmp, os.path.join(directory, f"{key}.json"))
+    cachedir.evict(directory, int(os.environ.get("REPORT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
@@ -4,14 +4,36 @@ import sys
 import docker
 import json
 
+import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from report import report_cache
+from report import verifier_session
+
 REPORT_ANNOTATIONS = "annotations"
 REPORT_RESULTS = "results"
 REPORT_DIGESTS = "digests"
 REPORT_METADATA = "metadata"
 
-def _get_report_info(report_path, info_type, profile_type, profile_version):
+ANNOTATIONS_PREFIX = "charts.openshift.io"
 
-    docker_command = "report " + info_type + " charts/"+os.path.basename(report_path)
+# report.yaml stores the helm chart metadata with the Go field names lower
+# cased, the verifier reports it with the helm JSON names.
+CHART_METADATA_KEYS = {
+    "apiversion": "apiVersion",
+    "appversion": "appVersion",
+    "kubeversion": "kubeVersion",
+}
+CHART_DEPENDENCY_KEYS = {
+    "importvalues": "import-values",
+}
+
+REPORTS = {}
+
+def _get_report_info(report_path, info_type, profile_type, profile_version):
 
     set_values = ""
     if profile_type:
@@ -22,12 +44,23 @@ def _get_report_info(report_path, info_type, profile_type, profile_version):
         else:
             set_values = "profile.version=%s" % profile_version
 
-    if set_values:
-        docker_command = "%s --set %s" % (docker_command, set_values)
-
-    client = docker.from_env()
-    report_directory = os.path.dirname(os.path.abspath(report_path))
-    output = client.containers.run(os.environ.get("VERIFIER_IMAGE"),docker_command,stdin_open=True,tty=True,stderr=True,volumes={report_directory: {'bind': '/charts/', 'mode': 'rw'}})
+    session = verifier_session.get_session()
+    try:
+        cache_key = report_cache.make_key(report_path, info_type, profile_type, profile_version, session.image_digest())
+    except docker.errors.DockerException as err:
+        print("[WARNING] Unable to get the verifier image digest, report cache disabled:", err)
+        cache_key = None
+    if cache_key:
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            print(f"[INFO] report {info_type} found in cache")
+            return cached
+
+    try:
+        output = session.report(report_path, info_type, set_values)
+    except docker.errors.DockerException as err:
+        print("[WARNING] Verifier session not available, running a single verifier container:", err)
+        output = _run_report_container(report_path, info_type, set_values)
     report_out = json.loads(output)
 
     if not info_type in report_out:
@@ -35,44 +68,165 @@ def _get_report_info(report_path, info_type, profile_type, profile_version):
         sys.exit(1)
 
     if info_type == REPORT_ANNOTATIONS:
-        annotations = {}
+        info = {}
         for report_annotation in report_out[REPORT_ANNOTATIONS]:
-            annotations[report_annotation["name"]] = report_annotation["value"]
+            info[report_annotation["name"]] = report_annotation["value"]
+    else:
+        info = report_out[info_type]
 
+    if cache_key:
+        report_cache.put(cache_key, info)
+    return info
+
+
+def _run_report_container(report_path, info_type, set_values):
+    docker_command = "report " + info_type + " charts/"+os.path.basename(report_path)
+    if set_values:
+        docker_command = "%s --set %s" % (docker_command, set_values)
+
+    client = docker.from_env()
+    report_directory = os.path.dirname(os.path.abspath(report_path))
+    return client.containers.run(os.environ.get("VERIFIER_IMAGE"),docker_command,stdin_open=True,tty=True,stderr=True,volumes={report_directory: {'bind': '/charts/', 'mode': 'rw'}})
+
+
+def _omit_empty(data, keys):
+    # Mirror the omitempty JSON tags of the helm chart metadata
+    out = {}
+    for key, value in data.items():
+        if value is None or value is False or value in ("", [], {}):
+            continue
+        out[keys.get(key, key)] = value
+    return out
+
+
+class Report:
+    """A report.yaml parsed once and served from memory.
+
+    Annotations, digests and metadata are read straight from the parsed
+    document. Results depend on the profile the report is checked against, so
+    they are still computed by the verifier container, once per profile.
+    """
+
+    def __init__(self, report_path):
+        self.report_path = report_path
+        self.results_by_profile = {}
+        try:
+            with open(report_path) as fd:
+                self.data = yaml.load(fd, Loader=SafeLoader)
+            self.tool = self.data["metadata"]["tool"]
+            self.chart_metadata = self.data["metadata"]["chart"]
+        except (OSError, yaml.YAMLError, KeyError, TypeError) as err:
+            print(f"[WARNING] Unable to parse {report_path}, using the verifier instead: {err}")
+            self.data = None
+
+    def annotations(self):
+        if self.data is None:
+            return _get_report_info(self.report_path, REPORT_ANNOTATIONS, "", "")
+
+        annotations = {}
+        digest = (self.tool.get("digests") or {}).get("chart") or self.tool.get("digest")
+        if digest:
+            annotations[f"{ANNOTATIONS_PREFIX}/digest"] = digest
+        for name in ("lastCertifiedTimestamp", "certifiedOpenShiftVersions",
+                     "testedOpenShiftVersion", "supportedOpenShiftVersions"):
+            if name in self.tool:
+                annotations[f"{ANNOTATIONS_PREFIX}/{name}"] = str(self.tool[name])
         return annotations
 
-    return report_out[info_type]
+    def digests(self):
+        if self.data is None:
+            return _get_report_info(self.report_path, REPORT_DIGESTS, "", "")
+
+        return dict(self.tool.get("digests") or {})
+
+    def metadata(self):
+        if self.data is None:
+            return _get_report_info(self.report_path, REPORT_METADATA, "", "")
+
+        chart = _omit_empty(self.chart_metadata, CHART_METADATA_KEYS)
+        if "dependencies" in chart:
+            chart["dependencies"] = [_omit_empty(d, CHART_DEPENDENCY_KEYS) for d in chart["dependencies"]]
+        if "maintainers" in chart:
+            chart["maintainers"] = [_omit_empty(m, {}) for m in chart["maintainers"]]
+        return {"verifier-version": self.tool.get("verifier-version", ""),
+                "profile": self.tool.get("profile", {}),
+                "chart-uri": self.tool.get("chart-uri", ""),
+                "chart": chart}
+
+    def results(self, profile_type, profile_version):
+        profile = (profile_type, profile_version)
+        if profile not in self.results_by_profile:
+            self.results_by_profile[profile] = _get_report_info(self.report_path, REPORT_RESULTS, profile_type, profile_version)
+        return dict(self.results_by_profile[profile])
+
+
+def get_report(report_path):
+    """Returns the parsed report, re-parsing only when the file has changed."""
+    path = os.path.abspath(report_path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    if path not in REPORTS or REPORTS[path][0] != key:
+        REPORTS[path] = (key, Report(report_path))
+    return REPORTS[path][1]
+
+
+def get_report_sections(report_path, sections, profile=None):
+    """Returns the requested report sections from a single parse of the report.
+
+    sections is a list of REPORT_ANNOTATIONS, REPORT_DIGESTS, REPORT_METADATA
+    and REPORT_RESULTS; profile is a (vendortype, version) tuple used for the
+    results.
+    """
+    profile_type, profile_version = profile or ("", "")
+    report = get_report(report_path)
+    out = {}
+    for section in sections:
+        if section == REPORT_ANNOTATIONS:
+            out[section] = report.annotations()
+        elif section == REPORT_DIGESTS:
+            out[section] = report.digests()
+        elif section == REPORT_METADATA:
+            out[section] = report.metadata()
+        elif section == REPORT_RESULTS:
+            results = report.results(profile_type, profile_version)
+            results["failed"] = int(results["failed"])
+            results["passed"] = int(results["passed"])
+            out[section] = results
+        else:
+            raise ValueError(f"Unknown report section: {section}")
+        print("[INFO] report %s : %s" % (section, out[section]))
+    return out
 
 
 def get_report_annotations(report_path):
-    annotations = _get_report_info(report_path,REPORT_ANNOTATIONS,"","")
+    annotations = get_report(report_path).annotations()
     print("[INFO] report annotations : %s" % annotations)
     return annotations
 
 def get_report_results(report_path, profile_type, profile_version):
-    results = _get_report_info(report_path,REPORT_RESULTS,profile_type,profile_version)
+    results = get_report(report_path).results(profile_type, profile_version)
     print("[INFO] report results : %s" % results)
     results["failed"] = int(results["failed"])
     results["passed"] = int(results["passed"])
     return results
-    
+
 def get_report_digests(report_path):
-    digests = _get_report_info(report_path,REPORT_DIGESTS,"","")
+    digests = get_report(report_path).digests()
     print("[INFO] report digests : %s" % digests)
     return digests
 
 def get_report_metadata(report_path):
-    metadata = _get_report_info(report_path,REPORT_METADATA,"","")
+    metadata = get_report(report_path).metadata()
     print("[INFO] report metadata : %s" % metadata)
     return metadata
 
 def get_report_chart_url(report_path):
-     metadata = _get_report_info(report_path,REPORT_METADATA,"","")
+     metadata = get_report(report_path).metadata()
      print("[INFO] report chart-uri : %s" % metadata["chart-uri"])
      return metadata["chart-uri"]
 
 def get_report_chart(report_path):
-     metadata = _get_report_info(report_path,REPORT_METADATA,"","")
+     metadata = get_report(report_path).metadata()
      print("[INFO] report chart : %s" % metadata["chart"])
      return metadata["chart"]
 
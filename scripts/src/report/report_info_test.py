@@ -0,0 +1,77 @@
+import os
+import re
+import shutil
+
+import docker
+import pytest
+
+from report import report_info
+from report import verifier_session
+
+REPORT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "..", "tests", "data", "report.yaml")
+
+def test_report_sections_are_parsed_in_process(tmpdir):
+    report_path = os.path.join(tmpdir, "report.yaml")
+    shutil.copy(REPORT_PATH, report_path)
+
+    annotations = report_info.get_report_annotations(report_path)
+    assert annotations == {
+        "charts.openshift.io/digest": "sha256:2e96d8f78fb494c8a5d6b9e21b677897011a55f8a005253f0e8dcf996c1d4183",
+        "charts.openshift.io/lastCertifiedTimestamp": "2021-07-09T14:48:37.949758+00:00",
+        "charts.openshift.io/certifiedOpenShiftVersions": "4.7.0",
+    }
+
+    digests = report_info.get_report_digests(report_path)
+    assert digests == {"chart": "sha256:2e96d8f78fb494c8a5d6b9e21b677897011a55f8a005253f0e8dcf996c1d4183"}
+
+    chart = report_info.get_report_chart(report_path)
+    assert chart["name"] == "vault"
+    assert chart["version"] == "0.13.0"
+    assert chart["apiVersion"] == "v2"
+    assert chart["kubeVersion"] == ">= 1.14.0-0"
+    assert "annotations" not in chart
+    assert "maintainers" not in chart
+
+    chart_url = report_info.get_report_chart_url(report_path)
+    assert chart_url.endswith("/tests/data/vault-0.13.0.tgz")
+
+def test_report_is_parsed_once(tmpdir):
+    report_path = os.path.join(tmpdir, "report.yaml")
+    shutil.copy(REPORT_PATH, report_path)
+
+    report = report_info.get_report(report_path)
+    assert report_info.get_report(report_path) is report
+
+    with open(report_path, "a") as fd:
+        fd.write("\n")
+    assert report_info.get_report(report_path) is not report
+
+def test_get_report_sections(tmpdir):
+    report_path = os.path.join(tmpdir, "report.yaml")
+    shutil.copy(REPORT_PATH, report_path)
+
+    sections = report_info.get_report_sections(report_path, [report_info.REPORT_METADATA, report_info.REPORT_DIGESTS])
+    assert set(sections) == {report_info.REPORT_METADATA, report_info.REPORT_DIGESTS}
+    assert sections[report_info.REPORT_METADATA]["chart"]["name"] == "vault"
+    assert sections[report_info.REPORT_DIGESTS]["chart"].startswith("sha256:")
+
+def test_session_connects_on_first_use(monkeypatch):
+    def from_env():
+        raise docker.errors.DockerException("daemon not available")
+    monkeypatch.setattr(docker, "from_env", from_env)
+
+    session = verifier_session.VerifierSession("verifier")
+    with pytest.raises(docker.errors.DockerException):
+        session.image_digest()
+
+def test_report_with_null_digests(tmpdir):
+    report_path = os.path.join(tmpdir, "report.yaml")
+    with open(REPORT_PATH) as fd:
+        content = fd.read()
+    with open(report_path, "w") as fd:
+        # digests: present but null
+        fd.write(re.sub(r"(\n +digests:\n) +chart: .*\n", r"\1", content))
+
+    annotations = report_info.get_report_annotations(report_path)
+    # Falls back to the digest field of older reports
+    assert annotations["charts.openshift.io/digest"].startswith("sha256:")
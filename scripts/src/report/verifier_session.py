@@ -0,0 +1,103 @@
+"""
+Long-lived chart-verifier container used to answer report queries.
+
+Starting a verifier container costs far more than the query itself, so the
+container is started once on first use, reports are copied into it and queried
+with exec, and it is removed when the process exits.
+"""
+import atexit
+import hashlib
+import io
+import os
+import tarfile
+import threading
+
+import docker
+
+REPORTS_DIRECTORY = "/tmp"
+
+SESSIONS = {}
+SESSIONS_LOCK = threading.Lock()
+
+
+class VerifierSession:
+
+    def __init__(self, image):
+        self.image = image
+        self.client = None
+        self.container = None
+        self.image_attrs = None
+        self.entrypoint = []
+        self.reports = set()
+        self.lock = threading.Lock()
+
+    def get_client(self):
+        # Connecting is deferred so that a missing docker daemon surfaces on
+        # first use, where callers handle DockerException
+        if self.client is None:
+            self.client = docker.from_env()
+        return self.client
+
+    def get_image(self):
+        if self.image_attrs is None:
+            client = self.get_client()
+            try:
+                image = client.images.get(self.image)
+            except docker.errors.ImageNotFound:
+                image = client.images.pull(self.image)
+            self.image_attrs = image.attrs
+        return self.image_attrs
+
+    def image_digest(self):
+        return self.get_image()["Id"]
+
+    def start(self):
+        self.entrypoint = self.get_image()["Config"].get("Entrypoint") or []
+        print(f"[INFO] Starting verifier session: {self.image}")
+        self.container = self.get_client().containers.run(self.image, entrypoint=["sleep", "infinity"], detach=True)
+        atexit.register(self.close)
+
+    def close(self):
+        if self.container is None:
+            return
+        print(f"[INFO] Stopping verifier session: {self.image}")
+        try:
+            self.container.remove(force=True)
+        except docker.errors.APIError as err:
+            print("[WARNING] Unable to remove verifier session container:", err)
+        self.container = None
+
+    def copy_report(self, report_path):
+        """Copies the report into the container, named after its content."""
+        with open(report_path, "rb") as fd:
+            content = fd.read()
+        name = hashlib.sha256(content).hexdigest() + ".yaml"
+        with self.lock:
+            if self.container is None:
+                self.start()
+            if name not in self.reports:
+                archive = io.BytesIO()
+                with tarfile.open(fileobj=archive, mode="w") as tar:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(content)
+                    tar.addfile(info, io.BytesIO(content))
+                self.container.put_archive(REPORTS_DIRECTORY, archive.getvalue())
+                self.reports.add(name)
+        return f"{REPORTS_DIRECTORY}/{name}"
+
+    def report(self, report_path, info_type, set_values):
+        command = self.entrypoint + ["report", info_type, self.copy_report(report_path)]
+        if set_values:
+            command += ["--set", set_values]
+        exit_code, output = self.container.exec_run(command)
+        if exit_code:
+            print(f"[WARNING] verifier report {info_type} exited with {exit_code}")
+        return output
+
+
+def get_session(image=None):
+    image = image or os.environ.get("VERIFIER_IMAGE")
+    with SESSIONS_LOCK:
+        if image not in SESSIONS:
+            SESSIONS[image] = VerifierSession(image)
+        return SESSIONS[image]
@@ -0,0 +1,86 @@
+"""
+On-disk cache for the reports generated by chart-verifier verify.
+
+A verify run is a function of the chart content, the verifier image, the
+profile vendor type, the checks enabled with -e and the OpenShift version of
+the cluster it runs against, so reports are keyed by the SHA-256 of all of
+them. Only reports whose checks all passed are cached, see all_checks_passed.
+Entries share the CHARTS_CACHE_DIR of the other caches and are kept under
+VERIFY_CACHE_MAX_BYTES by evicting the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from cachedir import cachedir
+
+CACHE_DIRECTORY = "verify"
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def chart_digest(chart_path):
+    """Returns the SHA-256 of a chart tarball, or of the relative paths and contents of a chart source directory."""
+    sha = hashlib.sha256()
+    if os.path.isfile(chart_path):
+        files = [(os.path.basename(chart_path), chart_path)]
+    else:
+        files = []
+        for root, dirs, names in os.walk(chart_path):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                files.append((os.path.relpath(path, chart_path), path))
+    for name, path in files:
+        sha.update(name.encode("utf-8") + b"\0")
+        with open(path, "rb") as fd:
+            for chunk in iter(lambda: fd.read(65536), b""):
+                sha.update(chunk)
+        sha.update(b"\0")
+    return sha.hexdigest()
+
+
+def make_key(chart_path, image_digest, vendor_type, flags, openshift_version):
+    query = "\0".join([chart_digest(chart_path), image_digest, vendor_type or "",
+                       ",".join(sorted(flags)), openshift_version])
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def all_checks_passed(report):
+    """Returns whether every check of the verify report passed, False when it cannot be parsed."""
+    try:
+        data = yaml.load(report, Loader=SafeLoader)
+    except yaml.YAMLError:
+        return False
+    results = data.get("results") if isinstance(data, dict) else None
+    if not results:
+        return False
+    return all(isinstance(result, dict) and result.get("outcome") == "PASS" for result in results)
+
+
+def get(key):
+    path = os.path.join(cachedir.get_cache_directory(CACHE_DIRECTORY), f"{key}.json")
+    try:
+        with open(path) as fd:
+            report = json.load(fd)["report"]
+    except (OSError, ValueError, KeyError):
+        return None
+    # Mark the entry as recently used
+    os.utime(path)
+    return report
+
+
+def put(key, report):
+    directory = cachedir.get_cache_directory(CACHE_DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as out:
+        json.dump({"report": report}, out)
+    os.replace(tmp, os.path.join(directory, f"{key}.json"))
+    cachedir.evict(directory, int(os.environ.get("VERIFY_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
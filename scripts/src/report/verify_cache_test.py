@@ -0,0 +1,32 @@
+import os
+
+from report import verify_cache
+
+def test_chart_digest_covers_paths_and_contents(tmpdir):
+    src = tmpdir.mkdir("src")
+    src.join("Chart.yaml").write("name: alpha\n")
+    src.mkdir("templates").join("deployment.yaml").write("kind: Deployment\n")
+    digest = verify_cache.chart_digest(str(src))
+    assert verify_cache.chart_digest(str(src)) == digest
+
+    src.join("templates", "deployment.yaml").write("kind: StatefulSet\n")
+    assert verify_cache.chart_digest(str(src)) != digest
+
+def test_put_and_get(tmpdir, monkeypatch):
+    monkeypatch.setenv("CHARTS_CACHE_DIR", str(tmpdir.join("cache")))
+    tarball = tmpdir.join("alpha-1.0.0.tgz")
+    tarball.write_binary(b"\x1f\x8b")
+    key = verify_cache.make_key(str(tarball), "sha256:1", "partner", ["has-readme"], "4.8.2")
+    assert key != verify_cache.make_key(str(tarball), "sha256:1", "partner", [], "4.8.2")
+    assert key != verify_cache.make_key(str(tarball), "sha256:1", "partner", ["has-readme"], "4.9.0")
+
+    assert verify_cache.get(key) is None
+    verify_cache.put(key, "apiversion: v1\n")
+    assert verify_cache.get(key) == "apiversion: v1\n"
+    assert os.path.exists(tmpdir.join("cache", verify_cache.CACHE_DIRECTORY, f"{key}.json"))
+
+def test_all_checks_passed():
+    report = "results:\n  - check: v1.0/helm-lint\n    outcome: PASS\n  - check: v1.0/chart-testing\n    outcome: %s\n"
+    assert verify_cache.all_checks_passed(report % "PASS")
+    assert not verify_cache.all_checks_passed(report % "FAIL")
+    assert not verify_cache.all_checks_passed("Error: unable to reach the cluster\n")
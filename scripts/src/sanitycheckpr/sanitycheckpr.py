@@ -10,56 +10,77 @@ try:
 except ImportError:
     from yaml import Loader, Dumper
 
+sys.path.append('../')
+from github import pullrequest
 
 ALLOW_CI_CHANGES = "allow/ci-changes"
 TYPE_MATCH_EXPRESSION = "(partners|redhat|community)"
 
+def get_index_entry(repository, branch, entry_name):
+    """Returns the chart versions of entry_name published in the index.
+
+    Only the index.d shard of the entry is downloaded. The full index.yaml is
+    used when the shard is missing, e.g. for index branches not sharded yet.
+    """
+    print("Downloading index shard", entry_name)
+    r = requests.get(f'https://raw.githubusercontent.com/{repository}/{branch}/index.d/{entry_name}.yaml')
+    if r.status_code == 200:
+        data = yaml.load(r.text, Loader=Loader)
+        return data[entry_name] or []
+
+    print("Downloading index.yaml", entry_name)
+    r = requests.get(f'https://raw.githubusercontent.com/{repository}/{branch}/index.yaml')
+    if r.status_code == 200:
+        data = yaml.load(r.text, Loader=Loader)
+    else:
+        data = {"apiVersion": "v1",
+            "entries": {}}
+    return data["entries"].get(entry_name, [])
+
+def chart_version_exists(repository, branch, entry_name, version):
+    """Checks whether version of entry_name is already published in the index.
+
+    Uses the index.d/versions.json lookup published with the index, and the
+    index itself when the lookup is not available.
+    """
+    print("Downloading index versions", entry_name, version)
+    r = requests.get(f'https://raw.githubusercontent.com/{repository}/{branch}/index.d/versions.json')
+    if r.status_code == 200:
+        versions = set(r.json().get(entry_name, []))
+    else:
+        versions = {v["version"] for v in get_index_entry(repository, branch, entry_name)}
+    return version in versions
+
 def ensure_only_chart_is_modified(api_url, repository, branch):
     # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    r = requests.get(api_url, headers=headers)
-    for label in r.json()["labels"]:
+    for label in pullrequest.get_labels(api_url):
         if label["name"] == ALLOW_CI_CHANGES:
             return
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-    r = requests.get(files_api_url, headers=headers)
     pattern = re.compile(r"charts/"+TYPE_MATCH_EXPRESSION+"/([\w-]+)/([\w-]+)/([\w\.-]+)/.*")
     reportpattern = re.compile(r"charts/"+TYPE_MATCH_EXPRESSION+"/([\w-]+)/([\w-]+)/([\w\.-]+)/report.yaml")
-    page_number = 1
-    max_page_size,page_size = 100,100
     match_found = False
     none_chart_files = {}
     file_count = 0
 
-    while page_size == max_page_size:
-
-        files_api_query = f'{files_api_url}?per_page={page_size}&page={page_number}'
-        print(f"Query files : {files_api_query}")
-        r = requests.get(files_api_query,headers=headers)
-        files = r.json()
-        page_size = len(files)
-        file_count += page_size
-        page_number += 1
-
-        for f in files:
-            file_path = f["filename"]
-            match = pattern.match(file_path)
-            if not match:
-                file_name = os.path.basename(file_path)
-                none_chart_files[file_name] = file_path
-            else:
-                if reportpattern.match(file_path):
-                    print("[INFO] Report found")
-                    print("::set-output name=report-exists::true")
-                if not match_found:
-                    pattern_match = match
-                    match_found = True
-                elif pattern_match.groups() != match.groups():
-                    msg = f"[ERROR] PR must only include one chart"
-                    print(msg)
-                    print(f"::set-output name=sanity-error-message::{msg}")
-                    sys.exit(1)
+    for f in pullrequest.get_files(api_url):
+        file_count += 1
+        file_path = f["filename"]
+        match = pattern.match(file_path)
+        if not match:
+            file_name = os.path.basename(file_path)
+            none_chart_files[file_name] = file_path
+        else:
+            if reportpattern.match(file_path):
+                print("[INFO] Report found")
+                print("::set-output name=report-exists::true")
+            if not match_found:
+                pattern_match = match
+                match_found = True
+            elif pattern_match.groups() != match.groups():
+                msg = f"[ERROR] PR must only include one chart"
+                print(msg)
+                print(f"::set-output name=sanity-error-message::{msg}")
+                sys.exit(1)
     
     if none_chart_files:
         if file_count > 1 or "OWNERS" not in none_chart_files: #OWNERS not present or preset but not the only file
@@ -91,24 +112,13 @@ def ensure_only_chart_is_modified(api_url, repository, branch):
     if match_found:
         category, organization, chart, version = pattern_match.groups()
         print(f"::set-output name=category::{'partner' if category == 'partners' else category}")
-        print("Downloading index.yaml", category, organization, chart, version)
-        r = requests.get(f'https://raw.githubusercontent.com/{repository}/{branch}/index.yaml')
-        if r.status_code == 200:
-            data = yaml.load(r.text, Loader=Loader)
-        else:
-            data = {"apiVersion": "v1",
-                "entries": {}}
-
-        crtentries = []
         entry_name = f"{organization}-{chart}"
-        d = data["entries"].get(entry_name, [])
         print(f"::set-output name=chart-entry-name::{entry_name}")
-        for v in d:
-            if v["version"] == version:
-                msg = f"[ERROR] Helm chart release already exists in the index.yaml: {version}"
-                print(msg)
-                print(f"::set-output name=sanity-error-message::{msg}")
-                sys.exit(1)
+        if chart_version_exists(repository, branch, entry_name, version):
+            msg = f"[ERROR] Helm chart release already exists in the index.yaml: {version}"
+            print(msg)
+            print(f"::set-output name=sanity-error-message::{msg}")
+            sys.exit(1)
 
         tag_name = f"{organization}-{chart}-{version}"
         print(f"::set-output name=chart-name-with-version::{tag_name}")
@@ -130,7 +140,11 @@ def main():
                                         help="Git Repository")
     parser.add_argument("-u", "--api-url", dest="api_url", type=str, required=True,
                                         help="API URL for the pull request")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                                        help="PR snapshot file written by pr-snapshot")
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
     branch = args.branch.split("/")[-1]
     ensure_only_chart_is_modified(args.api_url, args.repository, branch)
 
@@ -1,7 +1,6 @@
 import re
 import argparse
 import os
-import requests
 import json
 import yaml
 import sys
@@ -11,36 +10,26 @@ try:
 except ImportError:
     from yaml import Loader, Dumper
 
+sys.path.append('../')
+from github import pullrequest
+
 def check_if_ci_only_is_modified(api_url):
     # api_url https://api.github.com/repos/<organization-name>/<repository-name>/pulls/1
 
-    files_api_url = f'{api_url}/files'
-    headers = {'Accept': 'application/vnd.github.v3+json'}
-
     workflow_files = [re.compile(r".github/workflows/.*"),re.compile(r"scripts/.*"),re.compile(r"tests/.*")]
     skip_build_files = [re.compile(r"release/release_info.json"),re.compile(r"README.md"),re.compile(r"docs/([\w-]+)\.md")]
-    page_number = 1
-    max_page_size,page_size = 100,100
 
     workflow_found = False
     others_found = False
 
-    while (page_size == max_page_size):
-
-        files_api_query = f'{files_api_url}?per_page={page_size}&page={page_number}'
-        r = requests.get(files_api_query,headers=headers)
-        files = r.json()
-        page_size = len(files)
-        page_number += 1
-
-        for f in files:
-            filename = f["filename"]
-            if any([pattern.match(filename) for pattern in workflow_files]):
-                workflow_found = True
-            elif any([pattern.match(filename) for pattern in skip_build_files]):
-                others_found = True
-            else:
-                return False
+    for f in pullrequest.get_files(api_url):
+        filename = f["filename"]
+        if any([pattern.match(filename) for pattern in workflow_files]):
+            workflow_found = True
+        elif any([pattern.match(filename) for pattern in skip_build_files]):
+            others_found = True
+        else:
+            return False
 
     if others_found and not workflow_found:
         print(f"::set-output name=do-not-build::true")
@@ -71,7 +60,11 @@ def main():
                                         help="API URL for the pull request")
     parser.add_argument("-n", "--verify-user", dest="username", type=str, required=True,
                         help="check if the user can run tests")
+    parser.add_argument("--snapshot", dest="snapshot", type=str, required=False,
+                        help="PR snapshot file written by pr-snapshot")
     args = parser.parse_args()
+    if args.snapshot:
+        pullrequest.load_snapshot(args.snapshot)
     if not args.api_url:
         if verify_user(args.username):
             print(f"[INFO] User authorized for manual invocation - run tests.")
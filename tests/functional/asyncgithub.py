@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Asynchronous GitHub API client used by tests
+
+All requests share one aiohttp session and its connection pool, with at most
+GITHUB_API_CONCURRENCY requests in flight. The methods mirror the github_api
+helpers of functional.utils, so fixtures can issue many independent calls at
+once, e.g. to create or delete the branches of every chart under test.
+"""
+
+import asyncio
+import json
+import os
+
+import aiohttp
+
+from functional.utils import GITHUB_BASE_URL
+
+DEFAULT_CONCURRENCY = 8
+# Retries of requests hitting a secondary rate limit
+MAX_RETRIES = 5
+
+
+class Response:
+    """The parts of requests.Response the tests rely on."""
+
+    def __init__(self, status_code, text, headers):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class GitHubClient:
+    """Use as an async context manager:
+
+    async with GitHubClient(bot_token) as client:
+        r = await client.github_api('get', f'repos/{repo}/branches')
+    """
+
+    def __init__(self, bot_token, concurrency=None):
+        self.bot_token = bot_token
+        self.concurrency = concurrency or int(os.environ.get("GITHUB_API_CONCURRENCY", DEFAULT_CONCURRENCY))
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _request(self, method, endpoint, headers, json):
+        if not headers:
+            headers = {'Accept': 'application/vnd.github.v3+json',
+                       'Authorization': f'Bearer {self.bot_token}'}
+        url = f'{GITHUB_BASE_URL}/{endpoint}'
+        async with self.semaphore:
+            for attempt in range(MAX_RETRIES + 1):
+                async with self.session.request(method, url, headers=headers, json=json or None) as r:
+                    text = await r.text()
+                    retry_after = r.headers.get('Retry-After')
+                    if r.status not in (403, 429) or retry_after is None or attempt == MAX_RETRIES:
+                        return Response(r.status, text, dict(r.headers))
+                await asyncio.sleep(float(retry_after))
+
+    async def github_api_get(self, endpoint, headers={}):
+        return await self._request('GET', endpoint, headers, None)
+
+    async def github_api_delete(self, endpoint, headers={}):
+        return await self._request('DELETE', endpoint, headers, None)
+
+    async def github_api_post(self, endpoint, headers={}, json={}):
+        return await self._request('POST', endpoint, headers, json)
+
+    async def github_api(self, method, endpoint, headers={}, data={}, json={}):
+        if method == 'get':
+            return await self.github_api_get(endpoint, headers=headers)
+        elif method == 'post':
+            return await self.github_api_post(endpoint, headers=headers, json=json)
+        elif method == 'delete':
+            return await self.github_api_delete(endpoint, headers=headers)
+        else:
+            raise ValueError(
+                "Github API method not implemented in helper function")
+
+
+def github_api_all(bot_token, calls, concurrency=None):
+    """Runs the (method, endpoint) or (method, endpoint, kwargs) calls
+    concurrently and returns their responses in the same order."""
+    async def run():
+        async with GitHubClient(bot_token, concurrency) as client:
+            return await asyncio.gather(
+                *(client.github_api(call[0], call[1], **(call[2] if len(call) > 2 else {})) for call in calls))
+    return asyncio.run(run())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Progress journal of a submitted charts sweep
+
+The state of every chart (branch created, PR opened, run id, conclusion, index
+and release verified, result) is written to a JSON file after each change, so
+that an interrupted sweep can be resumed: finished charts are skipped and the
+workflow runs of in-flight charts are waited on again instead of being
+resubmitted.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def chart_key(chart):
+    """Key of a (vendor_type, vendor, chart_name, chart_version) tuple."""
+    return '/'.join(chart)
+
+
+class Journal:
+
+    def __init__(self, path=None, header=None):
+        """
+        Parameters:
+        path (str): file the journal is written to, or None to keep it in memory
+        header (dict): identifies the sweep, a journal is only resumed by a sweep with the same header
+        """
+        self.path = path
+        self.header = header or {}
+        self.charts = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path, header, resume):
+        journal = cls(path, header)
+        if path and resume and os.path.exists(path):
+            with open(path) as fd:
+                data = json.load(fd)
+            if data.get('header') == journal.header:
+                journal.charts = data.get('charts', {})
+                logger.info(f"Resuming sweep from '{path}' with {len(journal.charts)} charts")
+            else:
+                logger.warning(f"Journal '{path}' is for another sweep: {data.get('header')}, starting over")
+        journal.save()
+        return journal
+
+    def get(self, chart):
+        with self.lock:
+            return dict(self.charts.get(chart_key(chart), {}))
+
+    def update(self, chart, **fields):
+        with self.lock:
+            self.charts.setdefault(chart_key(chart), {}).update(fields)
+            self._save()
+
+    def is_finished(self, chart):
+        return 'result' in self.get(chart)
+
+    def is_in_flight(self, chart):
+        entry = self.get(chart)
+        return entry.get('branch_created', False) and 'result' not in entry
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as out:
+            json.dump({'header': self.header, 'charts': self.charts}, out, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -8,7 +8,7 @@ import os
 import sys
 import time
 
-import requests
+from github import httpcache
 
 from functional.utils import GITHUB_BASE_URL
 
@@ -37,13 +37,7 @@ def _make_gihub_request(method, uri, body=None, params={}, headers={}, verbose=F
     url = f'{GITHUB_BASE_URL}/repos/{endpoint_data["organization"]}/{endpoint_data["repo"]}/{uri}'
 
     print(f"API url: {url}")
-    method_map = {"get": requests.get,
-                  "post": requests.post,
-                  "put": requests.put,
-                  "delete": requests.delete,
-                  "patch": requests.patch}
-    request_method = method_map[method]
-    response = request_method(url, params=params, headers=headers, json=body)
+    response = httpcache.get_session().request(method, url, params=params, headers=headers, json=body)
     if verbose:
         print(json.dumps(headers, indent=4, sort_keys=True))
         print(json.dumps(body, indent=4, sort_keys=True))
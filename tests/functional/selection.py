@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Selection of the charts a software version change makes stale
+
+The scheduled workflow keeps the versions the charts were last tested with in
+software-version.yaml. Given that file from before and after the change, only
+the charts whose certification no longer holds are selected for testing:
+
+- an OpenShift patch release keeps every certification, charts are certified
+  for a major.minor version
+- a new OpenShift major.minor version makes stale the charts whose published
+  certifiedOpenShiftVersions is older
+- a new chart-verifier image makes every chart stale, the published index does
+  not record which verifier certified a chart
+- a chart missing from the published index is always stale
+"""
+
+import logging
+
+import yaml
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from github import httpcache
+
+logger = logging.getLogger(__name__)
+
+# Index of the charts released from PROD_REPO
+PUBLISHED_INDEX_URL = 'https://raw.githubusercontent.com/openshift-helm-charts/charts/gh-pages/index.yaml'
+CERTIFIED_OPENSHIFT_VERSIONS = 'charts.openshift.io/certifiedOpenShiftVersions'
+
+
+def load_software_versions(path):
+    """Returns the OpenShift version and chart-verifier digest of a software-version.yaml.
+
+    Parameters:
+    path (str): path to a copy of software-version.yaml
+
+    Returns:
+    dict: with `openshift` and `chart-verifier` keys, None for a missing value
+    """
+    with open(path) as fd:
+        data = yaml.load(fd, Loader=SafeLoader) or {}
+    return {'openshift': (data.get('openshift') or {}).get('release-client-version'),
+            'chart-verifier': (data.get('chart-verifier') or {}).get('latest-manifest-digest')}
+
+
+def get_published_entries(url=PUBLISHED_INDEX_URL):
+    """Returns the entries of the published index.yaml."""
+    r = httpcache.get_session().get(url)
+    r.raise_for_status()
+    index = yaml.load(r.content, Loader=SafeLoader)
+    return index.get('entries') or {}
+
+
+def minor_version(version):
+    """Returns the (major, minor) tuple of a version like 4.8.12, None if it is not one."""
+    parts = str(version).strip().strip('"').split('.')
+    try:
+        return int(parts[0]), int(parts[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def stale_reason(chart, entries, previous, current):
+    """Returns why the certification of chart is stale, None if it still holds.
+
+    Parameters:
+    chart (tuple): (vendor_type, vendor, chart_name, chart_version)
+    entries (dict): entries of the published index
+    previous (dict): versions before the change, from load_software_versions
+    current (dict): versions after the change, from load_software_versions
+    """
+    _, vendor_name, chart_name, chart_version = chart
+    releases = entries.get(f'{vendor_name}-{chart_name}') or []
+    release = next((r for r in releases if r.get('version') == chart_version), None)
+    if release is None:
+        return 'not in the published index'
+
+    if previous['chart-verifier'] != current['chart-verifier']:
+        return f"chart-verifier changed to {current['chart-verifier']}"
+
+    previous_openshift = minor_version(previous['openshift'])
+    current_openshift = minor_version(current['openshift'])
+    if current_openshift is None or previous_openshift == current_openshift:
+        return None
+    certified = minor_version((release.get('annotations') or {}).get(CERTIFIED_OPENSHIFT_VERSIONS, ''))
+    if certified is None or certified < current_openshift:
+        return f"certified for OpenShift {certified or 'N/A'}, now {current['openshift']}"
+    return None
+
+
+def select_stale_charts(charts, previous_path, current_path, entries=None):
+    """Returns the charts whose certification is stale after a software version change.
+
+    Parameters:
+    charts (list): (vendor_type, vendor, chart_name, chart_version) tuples
+    previous_path (str): software-version.yaml before the change
+    current_path (str): software-version.yaml after the change
+    entries (dict): entries of the published index, fetched when None
+    """
+    previous = load_software_versions(previous_path)
+    current = load_software_versions(current_path)
+    if entries is None:
+        entries = get_published_entries()
+
+    selected = []
+    for chart in charts:
+        reason = stale_reason(chart, entries, previous, current)
+        if reason:
+            logger.info(f"Select chart {chart}: {reason}")
+            selected.append(chart)
+    logger.info(f"{len(selected)} of {len(charts)} charts are stale")
+    return selected
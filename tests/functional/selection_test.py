@@ -0,0 +1,33 @@
+import pytest
+
+from functional.selection import stale_reason
+
+CHART = ('partners', 'acme', 'alpha', '1.0.0')
+ENTRIES = {'acme-alpha': [{'version': '0.9.0'},
+                          {'version': '1.0.0',
+                           'annotations': {'charts.openshift.io/certifiedOpenShiftVersions': '4.8'}}]}
+
+def versions(openshift, verifier='sha256:1'):
+    return {'openshift': openshift, 'chart-verifier': verifier}
+
+@pytest.mark.parametrize('chart, previous, current, stale', [
+    # Nothing changed
+    (CHART, versions('4.8.2'), versions('4.8.2'), False),
+    # A patch release keeps the certification
+    (CHART, versions('4.8.2'), versions('4.8.12'), False),
+    # A new minor makes charts certified for an older one stale
+    (CHART, versions('4.8.12'), versions('4.9.0'), True),
+    # A new verifier makes every chart stale
+    (CHART, versions('4.8.2'), versions('4.8.2', 'sha256:2'), True),
+    # Charts missing from the published index are always stale
+    (('partners', 'acme', 'alpha', '2.0.0'), versions('4.8.2'), versions('4.8.2'), True),
+    (('partners', 'acme', 'beta', '1.0.0'), versions('4.8.2'), versions('4.8.2'), True),
+])
+def test_stale_reason(chart, previous, current, stale):
+    assert (stale_reason(chart, ENTRIES, previous, current) is not None) == stale
+
+def test_new_minor_keeps_charts_certified_for_it():
+    entries = {'acme-alpha': [{'version': '1.0.0',
+                               'annotations': {'charts.openshift.io/certifiedOpenShiftVersions': '4.9'}}]}
+    assert stale_reason(CHART, entries, versions('4.8.12'), versions('4.9.0')) is None
+    assert stale_reason(CHART, {'acme-alpha': [{'version': '1.0.0'}]}, versions('4.8.12'), versions('4.9.0'))
@@ -8,10 +8,13 @@ import time
 import json
 
 import pytest
-import requests
 import yaml
 from retrying import retry
 
+from github import httpcache
+from catalogue import catalogue
+from chartarchive import chartarchive
+
 GITHUB_BASE_URL = 'https://api.github.com'
 # The sandbox repository where we run all our tests on
 TEST_REPO = 'openshift-helm-charts/sandbox'
@@ -33,7 +36,7 @@ def get_run_id(secrets, pr_number=None):
     pr = json.loads(r.text)
 
     r = github_api(
-        'get', f'repos/{secrets.test_repo}/actions/runs', secrets.bot_token)
+        'get', f'repos/{secrets.test_repo}/actions/runs?per_page=100', secrets.bot_token)
     runs = json.loads(r.text)
 
     for run in runs['workflow_runs']:
@@ -113,7 +116,7 @@ def extract_chart_tgz(src, dst, secrets, logger):
             os.rename(f'{dst}/{secrets.chart_name}', f'{dst}/src')
 
 
-def get_all_charts(charts_path: str, vendor_types: str) -> list:
+def get_all_charts(charts_path: str, vendor_types: str, charts_catalogue=None) -> list:
     # TODO: Support `community` as vendor_type.
     """Gets charts with src or tgz under `charts/` given vendor_types and without report.
 
@@ -121,6 +124,8 @@ def get_all_charts(charts_path: str, vendor_types: str) -> list:
     charts_path (str): path to the `charts/` directory
     vendor_types (str): vendor type to look for, any combination of `partner`, `redhat`, separated
         by commas, or `all` to run both `partner` and `redhat`.
+    charts_catalogue (catalogue.Catalogue): catalogue to look in, e.g. from `catalogue.load_tree`,
+        instead of the checkout of `charts_path`
 
     Returns:
     list: list of (vendor_type, vendor, chart_name, chart_version) tuples
@@ -134,32 +139,46 @@ def get_all_charts(charts_path: str, vendor_types: str) -> list:
     vendor_types = ['partners',
                     'redhat'] if 'all' in vendor_types else vendor_types
 
-    # Iterate through `charts/` to find chart submission with src or tgz
-    for vt in vendor_types:
-        charts_path_vt = f'{charts_path}/{vt}'
-        vendor_names = [name for name in os.listdir(
-            charts_path_vt) if os.path.isdir(f'{charts_path_vt}/{name}')]
-        for vn in vendor_names:
-            charts_path_vt_vn = f'{charts_path_vt}/{vn}'
-            chart_names = [name for name in os.listdir(
-                charts_path_vt_vn) if os.path.isdir(f'{charts_path_vt_vn}/{name}')]
-            for cn in chart_names:
-                charts_path_vt_vn_cn = f'{charts_path_vt_vn}/{cn}'
-                file_names = [name for name in os.listdir(
-                    charts_path_vt_vn_cn)]
-                if 'OWNERS' not in file_names:
-                    continue
-                chart_versions = [name for name in os.listdir(
-                    charts_path_vt_vn_cn) if os.path.isdir(f'{charts_path_vt_vn_cn}/{name}')]
-                # Only interest in latest chart version
-                if len(chart_versions) == 0:
-                    continue
-                cv = max(chart_versions)
-                charts_path_vt_vn_cn_cv = f'{charts_path_vt_vn_cn}/{cv}'
-                file_names = [name for name in os.listdir(
-                    charts_path_vt_vn_cn_cv)]
-                if 'report.yaml' not in file_names and (f'{cn}-{cv}.tgz' in file_names or 'src' in file_names):
-                    ret.append((vt, vn, cn, cv))
+    # Find the latest version of every chart with OWNERS, submitted with src or tgz
+    if charts_catalogue is None:
+        charts_catalogue = catalogue.load(charts_path)
+    for chart in charts_catalogue.by_category(vendor_types):
+        if chart.owners_path is None:
+            continue
+        latest = chart.latest()
+        if latest is None:
+            continue
+        if not latest.has_report and (latest.has_tarball or latest.has_source):
+            ret.append((chart.category, chart.organization, chart.name, latest.version))
+    return ret
+
+
+def get_chart_owners(repo_path: str, charts_catalogue, charts: list) -> dict:
+    """Gets the GitHub users in the OWNERS files of charts, read from the git object database.
+
+    Parameters:
+    repo_path (str): path to the git repository the catalogue was read from
+    charts_catalogue (catalogue.Catalogue): catalogue from `catalogue.load_tree`
+    charts (list): list of (vendor_type, vendor, chart_name, chart_version) tuples
+
+    Returns:
+    dict: list of GitHub user names by chart directory, e.g. `charts/partners/acme/awesome`
+    """
+    owners_shas = {}
+    for vendor_type, vendor_name, chart_name, _ in charts:
+        chart = charts_catalogue.get_chart(vendor_type, vendor_name, chart_name)
+        if chart and chart.owners_sha:
+            owners_shas[f'charts/{vendor_type}/{vendor_name}/{chart_name}'] = chart.owners_sha
+
+    blobs = catalogue.read_blobs(repo_path, owners_shas.values())
+    ret = {}
+    for chart_dir, sha in owners_shas.items():
+        try:
+            owners = yaml.safe_load(blobs[sha])
+            ret[chart_dir] = [owner.get('githubUsername', '') for owner in owners['users']]
+        except (KeyError, TypeError, yaml.YAMLError):
+            # Left for the OWNERS file of the checkout to be read and reported
+            continue
     return ret
 
 
@@ -201,19 +220,15 @@ def get_name_and_version_from_chart_tar(path):
     str: chart name
     str: chart version
     """
-    tar = tarfile.open(path)
-    for member in tar.getmembers():
-        if member.name.split('/')[-1] == 'Chart.yaml':
-            chart = tar.extractfile(member)
-            if chart is not None:
-                content = chart.read()
-                try:
-                    chart_yaml = yaml.safe_load(content)
-                    return chart_yaml['name'], chart_yaml['version']
-                except yaml.YAMLError as err:
-                    pytest.fail(f"error parsing '{path}': {err}")
-    else:
+    # Only the archive up to Chart.yaml is read
+    content = chartarchive.read_chart_yaml(path)
+    if content is None:
         pytest.fail(f"Chart.yaml not in {path}")
+    try:
+        chart_yaml = yaml.safe_load(content)
+        return chart_yaml['name'], chart_yaml['version']
+    except yaml.YAMLError as err:
+        pytest.fail(f"error parsing '{path}': {err}")
 
 
 def get_name_and_version_from_chart_src(path):
@@ -238,7 +253,7 @@ def github_api_get(endpoint, bot_token, headers={}):
     if not headers:
         headers = {'Accept': 'application/vnd.github.v3+json',
                    'Authorization': f'Bearer {bot_token}'}
-    r = requests.get(f'{GITHUB_BASE_URL}/{endpoint}', headers=headers)
+    r = httpcache.get_session().get(f'{GITHUB_BASE_URL}/{endpoint}', headers=headers)
 
     return r
 
@@ -247,7 +262,7 @@ def github_api_delete(endpoint, bot_token, headers={}):
     if not headers:
         headers = {'Accept': 'application/vnd.github.v3+json',
                    'Authorization': f'Bearer {bot_token}'}
-    r = requests.delete(f'{GITHUB_BASE_URL}/{endpoint}', headers=headers)
+    r = httpcache.get_session().delete(f'{GITHUB_BASE_URL}/{endpoint}', headers=headers)
 
     return r
 
@@ -256,8 +271,8 @@ def github_api_post(endpoint, bot_token, headers={}, json={}):
     if not headers:
         headers = {'Accept': 'application/vnd.github.v3+json',
                    'Authorization': f'Bearer {bot_token}'}
-    r = requests.post(f'{GITHUB_BASE_URL}/{endpoint}',
-                      headers=headers, json=json)
+    r = httpcache.get_session().post(f'{GITHUB_BASE_URL}/{endpoint}',
+                                     headers=headers, json=json)
 
     return r
 